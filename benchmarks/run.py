@@ -0,0 +1,229 @@
+"""Benchmark de latência dos endpoints.
+
+Cria um banco novo, popula com usuários e tarefas usando as factories dos
+testes e dispara cada cenário com concorrência fixa, reportando p50, p95,
+p99 e requisições por segundo.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --database-url postgresql+psycopg://...
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json
+
+ATENÇÃO: as tabelas do banco informado são apagadas e recriadas.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+
+DEFAULT_DATABASE_URL = 'sqlite+aiosqlite:///benchmark.db'
+BENCHMARK_PASSWORD = 'benchmark'
+SEARCH_TERMS = ['data', 'system', 'people', 'report', 'would']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run')
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--scenario', action='append', dest='scenarios')
+    parser.add_argument('--save', type=Path)
+    parser.add_argument('--compare', type=Path)
+    # Regressão tolerada no p95 em relação ao baseline (0.2 = 20%)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+async def seed(engine, n_users, n_tasks):
+    from sqlalchemy.ext.asyncio import AsyncSession  # noqa: PLC0415
+
+    from fastzero.models import table_registry  # noqa: PLC0415
+    from fastzero.security import get_password_hash  # noqa: PLC0415
+    from tests.conftest import TaskFactory, UserFactory  # noqa: PLC0415
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    # Um único hash para todos os usuários: o argon2 dominaria o seed
+    password = get_password_hash(BENCHMARK_PASSWORD)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        users = UserFactory.create_batch(n_users, password=password)
+        session.add_all(users)
+        await session.commit()
+
+        for user in users:
+            session.add_all(
+                TaskFactory.create_batch(n_tasks // n_users, user_id=user.id)
+            )
+        await session.commit()
+
+    return users
+
+
+async def login(client, user):
+    response = await client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': BENCHMARK_PASSWORD},
+    )
+    response.raise_for_status()
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+def build_scenarios(users, headers, tasks_per_user):
+    def random_user():
+        index = random.randrange(len(users))
+        return users[index], headers[index]
+
+    def auth_token(client):
+        user, _ = random_user()
+        return client.post(
+            '/auth/token',
+            data={'username': user.email, 'password': BENCHMARK_PASSWORD},
+        )
+
+    def tasks_list(client):
+        _, auth = random_user()
+        return client.get('/tasks/?limit=50', headers=auth)
+
+    def tasks_search(client):
+        _, auth = random_user()
+        term = random.choice(SEARCH_TERMS)
+        return client.get(f'/tasks/?search={term}&limit=50', headers=auth)
+
+    def tasks_patch(client):
+        index = random.randrange(len(users))
+        # As tarefas de cada usuário foram criadas em sequência no seed
+        task_id = index * tasks_per_user + random.randint(1, tasks_per_user)
+        return client.patch(
+            f'/tasks/{task_id}',
+            headers=headers[index],
+            json={'state': random.choice(['todo', 'doing', 'done'])},
+        )
+
+    def users_list(client):
+        return client.get('/users/?limit=50')
+
+    def user_get(client):
+        user, _ = random_user()
+        return client.get(f'/users/{user.id}')
+
+    return {
+        'auth_token': auth_token,
+        'tasks_list': tasks_list,
+        'tasks_search': tasks_search,
+        'tasks_patch': tasks_patch,
+        'users_list': users_list,
+        'user_get': user_get,
+    }
+
+
+async def run_scenario(client, scenario, n_requests, concurrency):
+    latencies = []
+    errors = 0
+    remaining = n_requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = perf_counter()
+            response = await scenario(client)
+            latencies.append(perf_counter() - start)
+            if response.status_code >= 400:  # noqa: PLR2004
+                errors += 1
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentiles[49] * 1000, 2),
+        'p95_ms': round(percentiles[94] * 1000, 2),
+        'p99_ms': round(percentiles[98] * 1000, 2),
+    }
+
+
+def print_report(results):
+    columns = ['requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms']
+    print(f'{"scenario":<14}' + ''.join(f'{c:>10}' for c in columns))
+    for name, result in results.items():
+        print(f'{name:<14}' + ''.join(f'{result[c]:>10}' for c in columns))
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        limit = baseline[name]['p95_ms'] * (1 + tolerance)
+        if result['p95_ms'] > limit:
+            regressions.append(
+                f'{name}: p95 {result["p95_ms"]}ms > {limit:.2f}ms '
+                f'(baseline {baseline[name]["p95_ms"]}ms)'
+            )
+
+    return regressions
+
+
+async def main(args):
+    import httpx  # noqa: PLC0415
+
+    from fastzero.app import app  # noqa: PLC0415
+    from fastzero.database import get_engine  # noqa: PLC0415
+
+    users = await seed(get_engine(), args.users, args.tasks)
+    tasks_per_user = args.tasks // args.users
+
+    # O ASGITransport não dispara o lifespan da aplicação
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(
+            transport=transport, base_url='http://benchmark'
+        ) as client,
+    ):
+        headers = [await login(client, user) for user in users]
+        scenarios = build_scenarios(users, headers, tasks_per_user)
+
+        results = {}
+        for name in args.scenarios or scenarios:
+            results[name] = await run_scenario(
+                client, scenarios[name], args.requests, args.concurrency
+            )
+
+    return results
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    # As configurações são lidas do ambiente na importação da aplicação
+    os.environ['DATABASE_URL'] = args.database_url
+
+    results = asyncio.run(main(args))
+    print_report(results)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + '\n')
+
+    if args.compare:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,112 @@
+"""Benchmark do tempo de inicialização da aplicação.
+
+Cada execução roda em um processo novo (importações a frio) e mede a
+importação de fastzero.app, o lifespan (engine e hasher) e a primeira
+requisição. O relatório usa a mediana das execuções.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --save benchmarks/startup.json
+    python -m benchmarks.startup --compare benchmarks/startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+DEFAULT_DATABASE_URL = 'sqlite+aiosqlite:///benchmark.db'
+PHASES = ['import_ms', 'lifespan_ms', 'first_request_ms', 'total_ms']
+
+# Executado em um processo novo; imprime os tempos em JSON
+CHILD = """
+import asyncio, json
+from time import perf_counter
+
+start = perf_counter()
+from fastzero.app import app
+import_ms = (perf_counter() - start) * 1000
+
+import httpx
+
+
+async def main():
+    start = perf_counter()
+    async with app.router.lifespan_context(app):
+        lifespan_ms = (perf_counter() - start) * 1000
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url='http://startup'
+        ) as client:
+            start = perf_counter()
+            response = await client.get('/')
+            first_request_ms = (perf_counter() - start) * 1000
+            response.raise_for_status()
+    return lifespan_ms, first_request_ms
+
+
+lifespan_ms, first_request_ms = asyncio.run(main())
+print(json.dumps({
+    'import_ms': import_ms,
+    'lifespan_ms': lifespan_ms,
+    'first_request_ms': first_request_ms,
+    'total_ms': import_ms + lifespan_ms + first_request_ms,
+}))
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.startup')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--save', type=Path)
+    parser.add_argument('--compare', type=Path)
+    # Regressão tolerada no total em relação ao baseline (0.2 = 20%)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def run_once() -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main(args) -> dict:
+    runs = [run_once() for _ in range(args.runs)]
+    return {
+        phase: round(statistics.median(run[phase] for run in runs), 2)
+        for phase in PHASES
+    }
+
+
+def print_report(results):
+    print(''.join(f'{phase:>18}' for phase in PHASES))
+    print(''.join(f'{results[phase]:>18}' for phase in PHASES))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    os.environ.setdefault('DATABASE_URL', DEFAULT_DATABASE_URL)
+
+    results = main(args)
+    print_report(results)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + '\n')
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        limit = baseline['total_ms'] * (1 + args.tolerance)
+        if results['total_ms'] > limit:
+            print(
+                f'REGRESSION startup: {results["total_ms"]}ms > '
+                f'{limit:.2f}ms (baseline {baseline["total_ms"]}ms)',
+                file=sys.stderr,
+            )
+            sys.exit(1)
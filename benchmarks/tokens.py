@@ -0,0 +1,58 @@
+"""Microbenchmark da verificação de tokens: com e sem o cache de claims.
+
+Mede o custo por chamada de `decode_access_token` quando o token já está
+no cache e quando precisa ser verificado (HMAC + parse dos claims).
+
+    python -m benchmarks.tokens
+    python -m benchmarks.tokens --iterations 100000
+"""
+
+import argparse
+import os
+import timeit
+
+DEFAULT_DATABASE_URL = 'sqlite+aiosqlite:///benchmark.db'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.tokens')
+    parser.add_argument('--iterations', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    return parser.parse_args(argv)
+
+
+def main(args):
+    from fastzero.security import (  # noqa: PLC0415
+        create_access_token,
+        decode_access_token,
+        token_cache,
+    )
+
+    token = create_access_token({'sub': 'benchmark@test.com', 'uid': 1})
+
+    def uncached():
+        token_cache.clear()
+        decode_access_token(token)
+
+    def cached():
+        decode_access_token(token)
+
+    results = {}
+    for name, func in [('uncached', uncached), ('cached', cached)]:
+        best = min(
+            timeit.repeat(func, number=args.iterations, repeat=args.repeat)
+        )
+        results[name] = best / args.iterations * 1_000_000
+
+    return results
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    # As configurações são lidas do ambiente na importação da aplicação
+    os.environ.setdefault('DATABASE_URL', DEFAULT_DATABASE_URL)
+
+    results = main(args)
+    for name, us_per_call in results.items():
+        print(f'{name:<10}{us_per_call:>10.2f} us/call')
+    print(f'speedup   {results["uncached"] / results["cached"]:>10.1f}x')
@@ -1,7 +1,5 @@
 #!/bin/sh
 
-# Executa as migrações do banco de dados
-poetry run alembic upgrade head
-
-# Inicia a aplicação
-poetry run uvicorn --host 0.0.0.0 --port 8000 fastzero.app:app
\ No newline at end of file
+# Inicia a aplicação (as migrações rodam em um passo separado:
+# `python -m fastzero.serve migrate`)
+exec poetry run python -m fastzero.serve
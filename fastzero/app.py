@@ -1,12 +1,67 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from functools import cache
 from http import HTTPStatus
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from fastzero.database import get_engine, new_session, pool_status
+from fastzero.metrics import (
+    MetricsMiddleware,
+    instrument_engine,
+    render_metrics,
+)
+from fastzero.querylog import instrument_query_log
+from fastzero.ratelimit import rate_limiter
+from fastzero.refresh_tokens import (
+    flush_revocations,
+    sync_revocations_periodically,
+)
 from fastzero.routers import auth, tasks, users
-from fastzero.schemas import Message
+from fastzero.schemas import Message, PoolStatus
+from fastzero.security import get_password_context
+from fastzero.settings import get_settings
+
+settings = get_settings()
+
+
+# Instrumenta o engine da aplicação uma única vez por processo
+@cache
+def setup_engine():
+    engine = get_engine()
+    instrument_engine(engine)
+
+    if settings.SLOW_QUERY_THRESHOLD_MS or settings.QUERY_BUDGET_PER_REQUEST:
+        instrument_query_log(
+            engine,
+            slow_query_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+            budget=settings.QUERY_BUDGET_PER_REQUEST,
+        )
+
+    return engine
 
-app = FastAPI()
+
+# Engine e hasher são construídos aqui, e não na importação do módulo, para
+# que o processo suba rápido; ainda assim ficam prontos antes da primeira
+# requisição
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    engine = setup_engine()
+    get_password_context()
+    revocation_sync = asyncio.create_task(
+        sync_revocations_periodically(new_session)
+    )
+    yield
+    revocation_sync.cancel()
+    with suppress(asyncio.CancelledError):
+        await revocation_sync
+    await flush_revocations(new_session)
+    await engine.dispose()
+
+
+# O rate limiting roda antes das dependências e do corpo de cada rota
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(rate_limiter)])
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(tasks.router)
@@ -18,8 +73,20 @@ app.add_middleware(
     allow_methods=['*'],  # Permitir todos os métodos
     allow_headers=['*'],  # Permitir todos os cabeçalhos
 )
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
 def read_root():
     return {'message': 'Hello World'}
+
+
+# Uso do pool de conexões deste worker
+@app.get('/health/pool', status_code=HTTPStatus.OK, response_model=PoolStatus)
+def read_pool_status():
+    return pool_status()
+
+
+@app.get('/metrics', include_in_schema=False)
+def read_metrics():
+    return Response(render_metrics(), media_type='text/plain; version=0.0.4')
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+from time import monotonic
+
+
+class TTLCache:
+    """Cache LRU em memória com tempo de expiração por entrada.
+
+    Não é compartilhado entre workers: cada processo mantém o seu.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at <= monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        self._data[key] = (monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+
+        # Remove as entradas menos usadas recentemente
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -1,11 +1,94 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from functools import cache
 
-from fastzero.settings import Settings
+from sqlalchemy import make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
-engine = create_engine(Settings().DATABASE_URL)
+from fastzero.settings import Settings, get_settings
 
 
-def get_session():  # pragma: no cover
-    with Session(engine) as session:
+def engine_options(settings: Settings) -> dict:
+    # SQLite (usado em testes) não aceita as opções de pool abaixo
+    if make_url(settings.DATABASE_URL).get_backend_name() != 'postgresql':
+        return {}
+
+    connect_args = {}
+    if settings.DATABASE_STATEMENT_TIMEOUT:
+        connect_args['options'] = (
+            f'-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT}'
+        )
+    if settings.DATABASE_PGBOUNCER:
+        # O PgBouncer pode trocar a conexão do servidor entre transações,
+        # então o psycopg não pode preparar statements
+        connect_args['prepare_threshold'] = None
+
+    return {
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+        'connect_args': connect_args,
+    }
+
+
+# Criado no primeiro uso (ou no lifespan da aplicação), e não na
+# importação: o driver do banco só é carregado quando necessário
+@cache
+def get_engine():
+    settings = get_settings()
+    return create_async_engine(
+        settings.DATABASE_URL, **engine_options(settings)
+    )
+
+
+# INSERT com suporte a ON CONFLICT (upsert) no dialeto do banco
+def upsert(dialect_name: str, table):
+    dialects = {'postgresql': postgresql, 'sqlite': sqlite}
+    return dialects[dialect_name].insert(table)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) de um statement (Postgres).
+
+    Compilado e executado pelo SQLAlchemy, então os parâmetros passam pelo
+    processamento normal dos tipos (ex.: Enum -> nome no banco).
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, 'postgresql')
+def _compile_explain(element, compiler, **kw):
+    return f'EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}'
+
+
+def pool_status() -> dict:
+    pool = get_engine().pool
+
+    # Nem todo pool (ex.: NullPool, StaticPool) mantém esses contadores
+    if not hasattr(pool, 'checkedout'):
+        return {'size': 0, 'checked_out': 0, 'idle': 0, 'overflow': 0}
+
+    return {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+    }
+
+
+# expire_on_commit=False evita um novo SELECT (await implícito) ao
+# acessar os atributos dos objetos depois do commit
+def new_session() -> AsyncSession:
+    return AsyncSession(get_engine(), expire_on_commit=False)
+
+
+async def get_session():  # pragma: no cover
+    async with new_session() as session:
         yield session
@@ -0,0 +1,69 @@
+# ETags e requisições condicionais (If-None-Match / If-Match).
+# O ETag de um recurso é o seu updated_at em microssegundos, o que permite
+# usar o If-Match direto no WHERE do UPDATE. O de uma coleção é um hash da
+# quantidade de linhas, do maior updated_at e dos parâmetros da consulta.
+from datetime import datetime, timedelta
+from hashlib import sha1
+from http import HTTPStatus
+
+from fastapi import HTTPException, Response
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def resource_etag(updated_at: datetime) -> str:
+    return f'"{(updated_at - EPOCH) // MICROSECOND}"'
+
+
+def collection_etag(*parts) -> str:
+    digest = sha1(':'.join(map(str, parts)).encode(), usedforsecurity=False)
+    return f'"{digest.hexdigest()}"'
+
+
+def _parse_header(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(',') if tag.strip()]
+
+
+# If-None-Match usa comparação fraca: o prefixo W/ é ignorado
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+
+    tags = _parse_header(header)
+    return '*' in tags or etag in {tag.removeprefix('W/') for tag in tags}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+    )
+
+
+def if_match_versions(header: str | None) -> list[datetime] | None:
+    """Versões (updated_at) aceitas pelo If-Match.
+
+    Retorna None quando não há pré-condição (cabeçalho ausente ou `*`).
+    If-Match usa comparação forte, então ETags fracos nunca casam.
+    """
+    if not header:
+        return None
+
+    tags = _parse_header(header)
+    if '*' in tags:
+        return None
+
+    versions = []
+    for tag in tags:
+        value = tag.strip('"')
+        if tag == f'"{value}"' and value.isdigit():
+            versions.append(EPOCH + int(value) * MICROSECOND)
+
+    return versions
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=HTTPStatus.PRECONDITION_FAILED,
+        detail='Resource has been modified',
+    )
@@ -0,0 +1,232 @@
+"""Métricas da aplicação no formato texto do Prometheus.
+
+As métricas ficam em memória e são por processo: com vários workers cada
+um expõe os seus próprios valores em /metrics.
+"""
+
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+from sqlalchemy import event
+
+REGISTRY = []
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [*zip(labelnames, values), *extra]
+    if not pairs:
+        return ''
+
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{n}="{v}"' for n, v in escaped) + '}'
+
+
+class _Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        # Algumas métricas são atualizadas pelas threads do pool do argon2
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict):
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        labels = _format_labels(self.labelnames, key)
+        return [f'{self.name}{labels} {value}']
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, *args, buckets=DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values:
+                # [contagem por bucket, soma, total de observações]
+                self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+
+            counts, _, _ = entry = self._values[key]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _render_value(self, key, value):
+        counts, total, count = value
+        labels = _format_labels(self.labelnames, key)
+
+        # O bucket +Inf é o total de observações
+        bounds = [*self.buckets, '+Inf']
+        lines = [
+            f'{self.name}_bucket'
+            f'{_format_labels(self.labelnames, key, [("le", bound)])} {n}'
+            for bound, n in zip(bounds, [*counts, count])
+        ]
+        lines.append(f'{self.name}_sum{labels} {total}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+def render_metrics() -> str:
+    return '\n'.join(line for m in REGISTRY for line in m.render()) + '\n'
+
+
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Requests being processed.', ['method']
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by route.',
+    ['method', 'route', 'status'],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request',
+    'Number of SQL statements executed per request.',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    'db_query_duration_per_request_seconds',
+    'Time spent executing SQL statements per request.',
+    ['route'],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    'password_hash_duration_seconds',
+    'Time spent in argon2 hashing and verification.',
+    ['operation'],
+)
+RATE_LIMITED_REQUESTS = Counter(
+    'http_requests_rate_limited_total',
+    'Requests rejected by the rate limiter.',
+    ['route'],
+)
+
+# Estatísticas de banco da requisição atual (None fora de uma requisição)
+_request_db_stats: ContextVar[dict | None] = ContextVar(
+    'request_db_stats', default=None
+)
+
+
+def current_request_stats() -> dict | None:
+    return _request_db_stats.get()
+
+
+def instrument_engine(engine):
+    sync_engine = getattr(engine, 'sync_engine', engine)
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, *args):
+        conn.info.setdefault('query_start_time', []).append(perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, *args):
+        elapsed = perf_counter() - conn.info['query_start_time'].pop()
+
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats['queries'] += 1
+            stats['time'] += elapsed
+
+
+def route_name(scope) -> str:
+    # Usa o template da rota (/tasks/{task_id}) e não a URL, para não
+    # criar uma série por id
+    route = scope.get('route')
+    return route.path if route else 'unmatched'
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede latência e uso do banco por rota."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = 500
+        stats = {'queries': 0, 'time': 0.0, 'scope': scope}
+        token = _request_db_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc(method=method)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            HTTP_REQUESTS_IN_PROGRESS.dec(method=method)
+            _request_db_stats.reset(token)
+
+            route = route_name(scope)
+
+            HTTP_REQUEST_DURATION.observe(
+                elapsed, method=method, route=route, status=status
+            )
+            DB_QUERIES_PER_REQUEST.observe(stats['queries'], route=route)
+            DB_TIME_PER_REQUEST.observe(stats['time'], route=route)
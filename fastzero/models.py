@@ -2,7 +2,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column, registry
 
 # registro de metadados
@@ -17,11 +17,23 @@ class TaskState(str, Enum):
     TRASH = 'trash'
 
 
+# Documento usado na busca textual de tarefas (Postgres). A consulta usa
+# exatamente a mesma expressão do índice GIN para que ele seja aproveitado
+TASK_SEARCH_CONFIG = 'simple'
+TASK_SEARCH_DOCUMENT = (
+    f"to_tsvector('{TASK_SEARCH_CONFIG}'::regconfig, "
+    "title || ' ' || description)"
+)
+
+
 # Mapeando um objeto para uma tabela do banco de dados
 @table_registry.mapped_as_dataclass
 class User:
     # Nome da tabela no bd
     __tablename__ = 'users'
+    # Busca os valores gerados pelo banco (created_at, updated_at) no
+    # próprio INSERT/UPDATE via RETURNING, dispensando o refresh
+    __mapper_args__ = {'eager_defaults': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
@@ -30,14 +42,33 @@ class User:
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
+    # Indexado para o count/max(updated_at) do ETag de GET /users
     updated_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now(), onupdate=func.now()
+        init=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+        index=True,
     )
 
 
 @table_registry.mapped_as_dataclass
 class Task:
     __tablename__ = 'tasks'
+    __mapper_args__ = {'eager_defaults': True}
+    __table_args__ = (
+        # Toda consulta de tarefas filtra por user_id. O id no final atende
+        # a ordenação/paginação por cursor e o state os filtros por estado
+        Index('ix_tasks_user_id_id', 'user_id', 'id'),
+        Index('ix_tasks_user_id_state_id', 'user_id', 'state', 'id'),
+        # Versão das tarefas do usuário (count/max(updated_at) do ETag de
+        # GET /tasks) resolvida com um index-only scan
+        Index('ix_tasks_user_id_updated_at', 'user_id', 'updated_at'),
+        Index(
+            'ix_tasks_search',
+            text(TASK_SEARCH_DOCUMENT),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
@@ -50,3 +81,25 @@ class Task:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+
+
+# Estado do rate limiting compartilhado entre workers (GCRA): o horário
+# teórico, em epoch, em que o balde do `key` estará cheio de novo
+@table_registry.mapped_as_dataclass
+class RateLimit:
+    __tablename__ = 'rate_limits'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    tat: Mapped[float]
+
+
+# Lista de revogação dos refresh tokens. `key` é `family:<id>` (tokens da
+# sessão com geração <= threshold) ou `user:<id>` (sessões iniciadas até o
+# instante `threshold`). Linhas com expires_at no passado podem ser apagadas
+@table_registry.mapped_as_dataclass
+class TokenRevocation:
+    __tablename__ = 'token_revocations'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    threshold: Mapped[float]
+    expires_at: Mapped[float]
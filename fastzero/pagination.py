@@ -0,0 +1,28 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+
+# O cursor é o último id retornado, codificado para o cliente tratá-lo
+# como um valor opaco
+def encode_cursor(last_id: int) -> str:
+    return urlsafe_b64encode(str(last_id).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(urlsafe_b64decode(cursor.encode()).decode())
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+        )
+
+
+# Só existe próxima página se a página atual veio completa
+def next_cursor(rows: list[dict], limit: int | None) -> str | None:
+    if not limit or len(rows) < limit:
+        return None
+
+    return encode_cursor(rows[-1]['id'])
@@ -0,0 +1,88 @@
+"""Log de queries lentas e detecção de requisições com queries demais.
+
+Em produção é habilitado pelos settings SLOW_QUERY_THRESHOLD_MS e
+QUERY_BUDGET_PER_REQUEST. Nos testes, `query_budget` falha o teste se o
+bloco executar mais queries do que o permitido.
+"""
+
+import logging
+from contextlib import contextmanager
+from time import perf_counter
+
+from sqlalchemy import event
+
+from fastzero.metrics import current_request_stats, route_name
+
+logger = logging.getLogger('fastzero.sql')
+
+
+def _origin() -> str:
+    stats = current_request_stats()
+    if stats is None:
+        return 'outside request'
+
+    scope = stats['scope']
+    return f'{scope["method"]} {route_name(scope)}'
+
+
+def instrument_query_log(engine, slow_query_ms: float, budget: int):
+    sync_engine = getattr(engine, 'sync_engine', engine)
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, *args):
+        conn.info.setdefault('querylog_start_time', []).append(perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, *args):
+        elapsed_ms = (
+            perf_counter() - conn.info['querylog_start_time'].pop()
+        ) * 1000
+
+        if slow_query_ms and elapsed_ms >= slow_query_ms:
+            logger.warning(
+                'Slow query (%.1f ms) from %s: %s parameters=%r',
+                elapsed_ms,
+                _origin(),
+                statement,
+                parameters,
+            )
+
+        stats = current_request_stats()
+        if not budget or stats is None:
+            return
+
+        stats['budget_queries'] = stats.get('budget_queries', 0) + 1
+        # Alerta uma única vez por requisição
+        if stats['budget_queries'] == budget + 1:
+            logger.warning(
+                'Query budget exceeded (more than %d queries) from %s: %s',
+                budget,
+                _origin(),
+                statement,
+            )
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(engine, max_queries: int):
+    """Falha se o bloco executar mais de `max_queries` statements."""
+    sync_engine = getattr(engine, 'sync_engine', engine)
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(sync_engine, 'before_cursor_execute', _count)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, 'before_cursor_execute', _count)
+
+    if len(statements) > max_queries:
+        raise QueryBudgetExceeded(
+            f'{len(statements)} queries executed, budget is {max_queries}:\n'
+            + '\n'.join(statements)
+        )
@@ -0,0 +1,201 @@
+"""Rate limiting por usuário (ou por IP, sem token válido) e por rota.
+
+Cada chave tem um token bucket implementado como GCRA: em vez de contar
+tokens guardamos só o horário teórico (`tat`) em que o balde estará cheio
+de novo, o que cabe em um float e em um único UPSERT no backend do banco.
+"""
+
+import math
+from dataclasses import dataclass
+from http import HTTPStatus
+from threading import Lock
+from time import monotonic, time
+
+from fastapi import HTTPException, Request
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy import case, delete, select
+
+from fastzero.database import get_engine, upsert
+from fastzero.metrics import RATE_LIMITED_REQUESTS, route_name
+from fastzero.models import RateLimit
+from fastzero.security import client_ip, decode_access_token
+from fastzero.settings import get_settings
+
+settings = get_settings()
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+    # Quanto o `tat` pode estar à frente de agora: a rajada de `limit`
+    # requisições seguidas
+    @property
+    def tolerance(self) -> float:
+        return self.period - self.interval
+
+
+def parse_rate(value: str) -> Rate:
+    """Converte '<limite>/<período>' (ex.: '5/minute') em um Rate."""
+    try:
+        limit, period = value.split('/')
+        rate = Rate(int(limit), PERIODS[period.strip()])
+    except (KeyError, ValueError):
+        raise ValueError(f'Invalid rate limit: {value!r}')
+
+    if rate.limit <= 0:
+        raise ValueError(f'Invalid rate limit: {value!r}')
+    return rate
+
+
+class MemoryBackend:
+    """Baldes em memória, por worker.
+
+    As chaves são divididas em shards, cada um com o seu lock, para que as
+    threads (rotas síncronas) raramente disputem o mesmo lock.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000):
+        self._shards = [({}, Lock()) for _ in range(shards)]
+        self._max_keys_per_shard = max(max_keys // shards, 1)
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        """Consome um token; retorna 0 ou os segundos até o próximo."""
+        buckets, lock = self._shards[hash(key) % len(self._shards)]
+        now = monotonic()
+
+        with lock:
+            tat = max(buckets.get(key, now), now)
+            if tat - now > rate.tolerance:
+                return tat - now - rate.tolerance
+
+            buckets[key] = tat + rate.interval
+            if len(buckets) > self._max_keys_per_shard:
+                self._prune(buckets, now)
+
+        return 0
+
+    # Baldes cheios de novo equivalem a chaves ausentes
+    @staticmethod
+    def _prune(buckets: dict, now: float):
+        for key in [key for key, tat in buckets.items() if tat <= now]:
+            del buckets[key]
+
+    def clear(self):
+        for buckets, lock in self._shards:
+            with lock:
+                buckets.clear()
+
+
+class DatabaseBackend:
+    """Baldes na tabela rate_limits, compartilhados entre workers.
+
+    Cada hit é um único INSERT ... ON CONFLICT DO UPDATE condicional: se a
+    linha voltar no RETURNING a requisição foi aceita.
+    """
+
+    PRUNE_INTERVAL = 60
+
+    def __init__(self, engine=None):
+        self._engine = engine
+        self._last_prune = 0.0
+
+    # Sem engine explícito usa o da aplicação, criado só no primeiro uso
+    @property
+    def engine(self):
+        return self._engine or get_engine()
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        now = time()
+        statement = upsert(self.engine.dialect.name, RateLimit).values(
+            key=key, tat=now + rate.interval
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[RateLimit.key],
+            set_={
+                'tat': case((RateLimit.tat > now, RateLimit.tat), else_=now)
+                + rate.interval
+            },
+            where=RateLimit.tat <= now + rate.tolerance,
+        ).returning(RateLimit.tat)
+
+        async with self.engine.begin() as conn:
+            if (await conn.execute(statement)).first():
+                retry_after = 0
+            else:
+                tat = await conn.scalar(
+                    select(RateLimit.tat).where(RateLimit.key == key)
+                )
+                # A linha pode ter sido removida entre os dois comandos
+                retry_after = (
+                    tat - now - rate.tolerance if tat else rate.interval
+                )
+
+            if now - self._last_prune > self.PRUNE_INTERVAL:
+                self._last_prune = now
+                await conn.execute(
+                    delete(RateLimit).where(RateLimit.tat <= now)
+                )
+
+        return retry_after
+
+
+class RateLimiter:
+    """Dependência global que aplica as regras por rota.
+
+    A chave é o `sub` do token quando ele é válido e o IP do cliente caso
+    contrário (ex.: /auth/token).
+    """
+
+    def __init__(self, backend, rules: dict[str, str], default: str = ''):
+        self.backend = backend
+        self.rules = {route: parse_rate(rate) for route, rate in rules.items()}
+        self.default = parse_rate(default) if default else None
+
+    def rate_for(self, method: str, route: str) -> Rate | None:
+        return self.rules.get(f'{method} {route}', self.default)
+
+    @staticmethod
+    def client_key(request: Request) -> str:
+        scheme, token = get_authorization_scheme_param(
+            request.headers.get('authorization')
+        )
+        if scheme.lower() == 'bearer' and token:
+            try:
+                return f'user:{decode_access_token(token)["sub"]}'
+            except (HTTPException, KeyError):
+                pass
+
+        return f'ip:{client_ip(request)}'
+
+    async def __call__(self, request: Request):
+        route = route_name(request.scope)
+        rate = self.rate_for(request.method, route)
+        if rate is None:
+            return
+
+        key = f'{request.method} {route}:{self.client_key(request)}'
+        retry_after = await self.backend.hit(key, rate)
+        if retry_after:
+            RATE_LIMITED_REQUESTS.inc(route=route)
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail='Too many requests',
+                headers={'Retry-After': str(math.ceil(retry_after))},
+            )
+
+
+rate_limiter = RateLimiter(
+    DatabaseBackend()
+    if settings.RATE_LIMIT_BACKEND == 'database'
+    else MemoryBackend(),
+    rules=settings.RATE_LIMITS,
+    default=settings.RATE_LIMIT_DEFAULT,
+)
@@ -0,0 +1,288 @@
+"""Refresh tokens de longa duração, renovados sem consultar o banco.
+
+O refresh token é assinado (com uma chave derivada, diferente da dos
+access tokens) e carrega o necessário para emitir um novo access token.
+Cada login cria uma família; a cada renovação a geração (`gen`) avança e
+as gerações anteriores são revogadas. Reusar um token já renovado revoga a
+família inteira.
+
+A lista de revogação fica em memória e é sincronizada com a tabela
+token_revocations a cada REFRESH_REVOCATION_SYNC_SECONDS: só as famílias e
+usuários revogados, com um limiar cada, e não um registro por token.
+"""
+
+import asyncio
+import hmac
+import logging
+import math
+from datetime import timedelta
+from hashlib import sha256
+from http import HTTPStatus
+from time import time
+from uuid import uuid4
+
+from fastapi import HTTPException
+from jwt import decode, encode
+from jwt.exceptions import PyJWTError
+from sqlalchemy import case, delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastzero.database import upsert
+from fastzero.models import TokenRevocation
+from fastzero.security import JWT_KEY
+from fastzero.settings import get_settings
+
+logger = logging.getLogger('fastzero.auth')
+settings = get_settings()
+
+REFRESH_JWT_KEY = hmac.new(JWT_KEY, b'refresh-token', sha256).digest()
+REFRESH_TOKEN_LIFETIME = timedelta(
+    days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+).total_seconds()
+
+
+def _invalid_refresh_token():
+    return HTTPException(
+        status_code=HTTPStatus.UNAUTHORIZED,
+        detail='Invalid refresh token',
+    )
+
+
+def create_refresh_token(
+    email: str,
+    user_id: int,
+    family: str | None = None,
+    generation: int = 0,
+    auth_time: float | None = None,
+) -> str:
+    now = time()
+    return encode(
+        {
+            'sub': email,
+            'uid': user_id,
+            'fam': family or uuid4().hex,
+            'gen': generation,
+            # Início da sessão (login), preservado nas renovações
+            'auth_time': auth_time or now,
+            'exp': now + REFRESH_TOKEN_LIFETIME,
+        },
+        REFRESH_JWT_KEY,
+        algorithm='HS256',
+    )
+
+
+def decode_refresh_token(token: str) -> dict:
+    try:
+        return decode(
+            token,
+            REFRESH_JWT_KEY,
+            algorithms=['HS256'],
+            options={'require': ['sub', 'uid', 'fam', 'gen', 'auth_time']},
+        )
+    except PyJWTError:
+        raise _invalid_refresh_token()
+
+
+class RevocationList:
+    """Limiar de revogação por família (`gen`) e por usuário (`auth_time`).
+
+    Revogações feitas neste worker valem na hora; as dos outros workers
+    chegam na próxima sincronização.
+    """
+
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._entries = {}
+        # Revogações locais ainda não gravadas no banco
+        self._pending = {}
+        self._last_sync = -math.inf
+
+    @staticmethod
+    def _merge(entries: dict, key: str, threshold: float, expires_at: float):
+        current = entries.get(key, (-math.inf, 0))
+        entries[key] = (
+            max(current[0], threshold),
+            max(current[1], expires_at),
+        )
+
+    def is_revoked(self, claims: dict) -> bool:
+        family = self._entries.get(f'family:{claims["fam"]}')
+        user = self._entries.get(f'user:{claims["uid"]}')
+        return bool(
+            (family and claims['gen'] <= family[0])
+            or (user and claims['auth_time'] <= user[0])
+        )
+
+    def revoke(self, key: str, threshold: float, expires_at: float):
+        self._merge(self._entries, key, threshold, expires_at)
+        self._merge(self._pending, key, threshold, expires_at)
+
+    @staticmethod
+    async def _save(session: AsyncSession, entries: dict):
+        statement = upsert(session.bind.dialect.name, TokenRevocation)
+        excluded = statement.excluded
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[TokenRevocation.key],
+                set_={
+                    column: case(
+                        (
+                            excluded[column]
+                            > getattr(TokenRevocation, column),
+                            excluded[column],
+                        ),
+                        else_=getattr(TokenRevocation, column),
+                    )
+                    for column in ['threshold', 'expires_at']
+                },
+            ),
+            [
+                {'key': key, 'threshold': threshold, 'expires_at': expires_at}
+                for key, (threshold, expires_at) in entries.items()
+            ],
+        )
+
+    async def revoke_now(
+        self,
+        session: AsyncSession,
+        key: str,
+        threshold: float,
+        expires_at: float,
+    ):
+        """Revoga e grava no banco, na transação da sessão.
+
+        Usado no logout e em alterações do usuário, que não podem esperar
+        a próxima sincronização. O commit fica a cargo de quem chama.
+        """
+        self._merge(self._entries, key, threshold, expires_at)
+        await self._save(session, {key: self._entries[key]})
+
+    async def flush(self, session: AsyncSession):
+        """Grava as revogações pendentes, sem ler as dos outros workers."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        try:
+            await self._save(session, pending)
+            await session.commit()
+        except SQLAlchemyError:
+            for key, entry in pending.items():
+                self._merge(self._pending, key, *entry)
+            raise
+
+    async def sync(self, session: AsyncSession, force: bool = False):
+        now = time()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+
+        pending, self._pending = self._pending, {}
+        try:
+            if pending:
+                await self._save(session, pending)
+            await session.execute(
+                delete(TokenRevocation).where(
+                    TokenRevocation.expires_at <= now
+                )
+            )
+            rows = (
+                await session.execute(
+                    select(
+                        TokenRevocation.key,
+                        TokenRevocation.threshold,
+                        TokenRevocation.expires_at,
+                    )
+                )
+            ).all()
+            await session.commit()
+        except SQLAlchemyError:
+            for key, entry in pending.items():
+                self._merge(self._pending, key, *entry)
+            raise
+
+        # Revogações só aumentam até expirar, então as lidas do banco são
+        # somadas às da memória em vez de substituí-las: as feitas durante a
+        # sincronização (revoke e revoke_now) podem não estar em `rows`
+        entries = {
+            key: entry
+            for key, entry in self._entries.items()
+            if entry[1] > now
+        }
+        for key, threshold, expires_at in rows:
+            self._merge(entries, key, threshold, expires_at)
+        self._entries = entries
+
+    def clear(self):
+        self._entries.clear()
+        self._pending.clear()
+        self._last_sync = -math.inf
+
+
+revocation_list = RevocationList(
+    sync_interval=settings.REFRESH_REVOCATION_SYNC_SECONDS
+)
+
+
+async def sync_revocations_periodically(session_factory):
+    """Sincroniza a lista em segundo plano (iniciado no lifespan).
+
+    Sem isso as gerações renovadas só chegariam ao banco na próxima
+    renovação feita neste worker após o intervalo.
+    """
+    while True:
+        await asyncio.sleep(max(revocation_list.sync_interval, 1))
+        try:
+            async with session_factory() as session:
+                await revocation_list.sync(session, force=True)
+        except SQLAlchemyError:
+            logger.exception('Failed to sync the token revocation list')
+
+
+# No desligamento do worker (restart, scale-in): as revogações pendentes
+# sumiriam com o processo e os tokens renovados voltariam a valer
+async def flush_revocations(session_factory):
+    try:
+        async with session_factory() as session:
+            await revocation_list.flush(session)
+    except SQLAlchemyError:
+        logger.exception('Failed to save pending token revocations')
+
+
+async def rotate_refresh_token(session: AsyncSession, token: str) -> dict:
+    """Valida o refresh token e revoga a geração usada.
+
+    Retorna os claims para emitir os novos tokens. Só acessa o banco quando
+    a lista de revogação precisa ser sincronizada ou um reuso é detectado.
+    """
+    claims = decode_refresh_token(token)
+    await revocation_list.sync(session)
+
+    family = f'family:{claims["fam"]}'
+    if revocation_list.is_revoked(claims):
+        # Token já renovado sendo reusado: possivelmente vazou
+        await revocation_list.revoke_now(
+            session, family, math.inf, time() + REFRESH_TOKEN_LIFETIME
+        )
+        await session.commit()
+        raise _invalid_refresh_token()
+
+    revocation_list.revoke(family, claims['gen'], claims['exp'])
+    return claims
+
+
+async def revoke_user_tokens(session: AsyncSession, user_id: int):
+    await revocation_list.revoke_now(
+        session, f'user:{user_id}', time(), time() + REFRESH_TOKEN_LIFETIME
+    )
+
+
+async def revoke_refresh_token(session: AsyncSession, token: str):
+    claims = decode_refresh_token(token)
+    await revocation_list.revoke_now(
+        session,
+        f'family:{claims["fam"]}',
+        math.inf,
+        time() + REFRESH_TOKEN_LIFETIME,
+    )
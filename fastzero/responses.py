@@ -0,0 +1,39 @@
+# Caminho rápido para endpoints de listagem: as linhas são lidas como
+# tuplas (sem instanciar objetos do ORM) e serializadas direto com orjson,
+# sem a validação do response_model.
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+__all__ = ['ORJSONResponse', 'fetch_rows', 'public_columns']
+
+
+# Colunas do model correspondentes aos campos do schema público.
+# `fields` (separados por vírgula) restringe as colunas; o id é sempre
+# incluído porque é usado na paginação por cursor
+def public_columns(
+    model, schema: type[BaseModel], fields: str | None = None
+) -> list:
+    if not fields:
+        return [getattr(model, field) for field in schema.model_fields]
+
+    selected = {field.strip() for field in fields.split(',') if field.strip()}
+    unknown = selected - schema.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f'Unknown fields: {", ".join(sorted(unknown))}',
+        )
+
+    return [
+        getattr(model, field)
+        for field in schema.model_fields
+        if field in selected or field == 'id'
+    ]
+
+
+async def fetch_rows(session, query) -> list[dict]:
+    result = await session.execute(query)
+    return [dict(row) for row in result.mappings()]
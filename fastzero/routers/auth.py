@@ -1,18 +1,25 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastzero.database import get_session
 from fastzero.models import User
-from fastzero.schemas import Token
+from fastzero.refresh_tokens import (
+    create_refresh_token,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
+from fastzero.schemas import RefreshTokenSchema, Token
 from fastzero.security import (
+    client_ip,
     create_access_token,
-    get_current_user,
-    verify_password,
+    dummy_password_hash,
+    login_throttle,
+    verify_password_async,
 )
 
 router = APIRouter(
@@ -21,28 +28,75 @@ router = APIRouter(
     # Parâmetro para organizar as rotas na documentação
     tags=['auth'],
 )
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
 # Indica que o formulário auth form deve ser recebido
 T_OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 
 
 @router.post('/token', response_model=Token)
-def login_for_access_token(session: T_Session, form_data: T_OAuth2Form):
-    # Verificando existência do usuário e se a senha está correta
-    user = session.scalar(select(User).where(User.email == form_data.username))
-    if not user or not verify_password(form_data.password, user.password):
+async def login_for_access_token(
+    request: Request, session: T_Session, form_data: T_OAuth2Form
+):
+    throttle_keys = login_throttle.keys(form_data.username, client_ip(request))
+    # Conta ou IP bloqueados: recusa sem consultar o banco nem rodar o argon2
+    login_throttle.check(throttle_keys)
+
+    # Verificando existência do usuário e se a senha está correta. Emails
+    # inexistentes também passam pelo argon2, com o mesmo custo
+    user = await session.scalar(
+        select(User).where(User.email == form_data.username)
+    )
+    password_hash = user.password if user else dummy_password_hash()
+    valid_password = await verify_password_async(
+        form_data.password, password_hash
+    )
+    if not user or not valid_password:
+        login_throttle.record_failure(throttle_keys)
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect email or password',
         )
 
-    access_token = create_access_token(data_payload={'sub': user.email})
+    login_throttle.record_success(throttle_keys)
+
+    access_token = create_access_token(
+        data_payload={'sub': user.email, 'uid': user.id}
+    )
 
-    return {'token_type': 'Bearer', 'access_token': access_token}
+    return {
+        'token_type': 'Bearer',
+        'access_token': access_token,
+        'refresh_token': create_refresh_token(user.email, user.id),
+    }
 
 
+# Renova sem consultar a tabela de usuários: os claims do refresh token
+# bastam para emitir o novo access token
 @router.post('/refresh/token', response_model=Token)
-def refresh_access_token(user: User = Depends(get_current_user)):
-    new_access_token = create_access_token(data_payload={'sub': user.email})
+async def refresh_access_token(
+    payload: RefreshTokenSchema, session: T_Session
+):
+    claims = await rotate_refresh_token(session, payload.refresh_token)
+
+    new_access_token = create_access_token(
+        data_payload={'sub': claims['sub'], 'uid': claims['uid']}
+    )
+    new_refresh_token = create_refresh_token(
+        claims['sub'],
+        claims['uid'],
+        family=claims['fam'],
+        generation=claims['gen'] + 1,
+        auth_time=claims['auth_time'],
+    )
+
+    return {
+        'token_type': 'Bearer',
+        'access_token': new_access_token,
+        'refresh_token': new_refresh_token,
+    }
+
 
-    return {'token_type': 'Bearer', 'access_token': new_access_token}
+@router.post('/logout', status_code=HTTPStatus.NO_CONTENT)
+async def logout(payload: RefreshTokenSchema, session: T_Session):
+    await revoke_refresh_token(session, payload.refresh_token)
+    await session.commit()
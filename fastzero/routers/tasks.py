@@ -1,47 +1,209 @@
 from http import HTTPStatus
-from typing import Annotated
+from io import TextIOWrapper
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import (
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastzero.cache import TTLCache
+from fastzero.database import Explain, get_session
+from fastzero.etags import (
+    collection_etag,
+    etag_matches,
+    if_match_versions,
+    not_modified,
+    precondition_failed,
+    resource_etag,
+)
+from fastzero.models import (
+    TASK_SEARCH_CONFIG,
+    TASK_SEARCH_DOCUMENT,
+    Task,
+    TaskState,
+)
+from fastzero.pagination import decode_cursor, next_cursor
+from fastzero.responses import ORJSONResponse, fetch_rows, public_columns
+from fastzero.schemas import (
+    TaskBulkCreate,
+    TaskBulkIds,
+    TaskBulkUpdate,
+    TaskImportReport,
+    TaskList,
+    TaskPublic,
+    TaskSchema,
+    TaskStats,
+    TaskUpdate,
+)
+from fastzero.security import get_current_user_id
+from fastzero.settings import get_settings
+from fastzero.streaming import (
+    MEDIA_TYPES,
+    csv_chunks,
+    iter_csv,
+    iter_ndjson,
+    ndjson_chunks,
+)
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+# Limita o tamanho do relatório; o total de falhas continua sendo contado
+IMPORT_MAX_ERRORS = 1000
 
-from fastzero.database import get_session
-from fastzero.models import Task, User
-from fastzero.schemas import TaskList, TaskPublic, TaskSchema, TaskUpdate
-from fastzero.security import get_current_user
+settings = get_settings()
 
 router = APIRouter(prefix='/tasks', tags=['tasks'])
-T_Session = Annotated[Session, Depends(get_session)]
-T_User = Annotated[User, Depends(get_current_user)]
+# Contagens exatas por (user_id, state), invalidadas a cada escrita
+task_count_cache = TTLCache(
+    maxsize=settings.TASK_COUNT_CACHE_SIZE,
+    ttl=settings.TASK_COUNT_CACHE_TTL_SECONDS,
+)
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_UserId = Annotated[int, Depends(get_current_user_id)]
+
+
+def _search_tasks(query, dialect_name: str, search: str):
+    if dialect_name == 'postgresql':
+        document = literal_column(TASK_SEARCH_DOCUMENT)
+        ts_query = func.websearch_to_tsquery(
+            literal_column(f"'{TASK_SEARCH_CONFIG}'::regconfig"), search
+        )
+        return query.where(document.op('@@')(ts_query)).order_by(
+            func.ts_rank(document, ts_query).desc()
+        )
+
+    # Fallback (SQLite nos testes): todos os termos precisam aparecer no
+    # título ou na descrição
+    for term in search.split():
+        query = query.where(
+            or_(
+                Task.title.icontains(term, autoescape=True),
+                Task.description.icontains(term, autoescape=True),
+            )
+        )
+
+    return query
+
+
+def invalidate_task_counts(user_id: int):
+    for state in [None, *TaskState]:
+        task_count_cache.delete((user_id, state))
+
+
+async def _count_tasks(
+    session: AsyncSession, query, cache_key: tuple | None
+) -> tuple[int, bool]:
+    """Retorna (total, é_estimativa) das linhas filtradas por `query`.
+
+    Com `cache_key` (sem filtros de texto) a contagem é exata, resolvida
+    pelo índice (user_id, state, id), e fica em cache até a próxima escrita.
+    Sem ela, no Postgres usamos a estimativa do planner para não pagar um
+    COUNT(*) sobre o ILIKE/busca textual.
+    """
+    filtered = query.order_by(None).with_only_columns(Task.id)
+    count_query = select(func.count()).select_from(filtered.subquery())
+
+    if cache_key is not None:
+        total = task_count_cache.get(cache_key)
+        if total is None:
+            total = await session.scalar(count_query)
+            task_count_cache.set(cache_key, total)
+        return total, False
+
+    dialect = session.bind.dialect
+    if dialect.name != 'postgresql':
+        return await session.scalar(count_query), False
+
+    plan = await session.scalar(Explain(filtered))
+    return int(plan[0]['Plan']['Plan Rows']), True
+
+
+def _reconcile_estimate(
+    estimate: int,
+    page_size: int,
+    offset: int | None,
+    limit: int | None,
+    cursor: str | None,
+) -> tuple[int, bool]:
+    """Ajusta a estimativa do planner à página já carregada.
+
+    Na última página (sem cursor) o total exato é offset + tamanho da
+    página, sem custo. Nas demais a estimativa não pode ser menor que as
+    linhas já vistas.
+    """
+    # Uma página vazia com offset pode estar além do fim: não diz nada
+    if not page_size:
+        return (0, False) if not offset and not cursor else (estimate, True)
+
+    seen = page_size if cursor else (offset or 0) + page_size
+    if not cursor and (limit is None or page_size < limit):
+        return seen, False
+
+    return max(estimate, seen), True
+
+
+def task_by_id_query(user_id: int, task_id: int):
+    return select(Task).where(Task.user_id == user_id, Task.id == task_id)
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=TaskPublic)
-def create_task(task: TaskSchema, session: T_Session, user: T_User):
+async def create_task(task: TaskSchema, session: T_Session, user_id: T_UserId):
     db_task = Task(
         title=task.title,
         description=task.description,
         state=task.state,
-        user_id=user.id,
+        user_id=user_id,
     )
 
     session.add(db_task)
-    session.commit()
-    session.refresh(db_task)
+    await session.commit()
+    invalidate_task_counts(user_id)
 
     return db_task
 
 
-@router.get('/', response_model=TaskList)
-def list_tasks(
-    session: T_Session,
-    user: T_User,
+def list_tasks_query(
+    user_id: int,
+    dialect_name: str,
     title: str | None = None,
     description: str | None = None,
     state: str | None = None,
     offset: int | None = None,
     limit: int | None = None,
+    cursor: str | None = None,
+    search: str | None = None,
 ):
-    query = select(Task).where(Task.user_id == user.id)
+    query = select(Task).where(Task.user_id == user_id)
+
+    # Resultados da busca são ordenados por relevância, não por id
+    if search:
+        if cursor:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail='Cursor pagination is not supported with search',
+            )
+
+        query = _search_tasks(query, dialect_name, search)
 
     if title:
         query = query.where(Task.title.contains(title))
@@ -52,16 +214,325 @@ def list_tasks(
     if state:
         query = query.where(Task.state == state)
 
-    tasks = session.scalars(query.offset(offset).limit(limit)).all()
+    # Paginação por cursor (keyset): evita varrer as linhas do offset
+    if cursor:
+        query = query.where(Task.id > decode_cursor(cursor))
+    else:
+        query = query.offset(offset)
+
+    return query.order_by(Task.id).limit(limit)
+
+
+@router.get('/', response_model=TaskList, response_class=ORJSONResponse)
+async def list_tasks(  # noqa: PLR0913, PLR0917
+    request: Request,
+    session: T_Session,
+    user_id: T_UserId,
+    title: str | None = None,
+    description: str | None = None,
+    state: str | None = None,
+    offset: int | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    search: str | None = None,
+    # Lista de campos separados por vírgula (ex.: fields=title,state)
+    fields: str | None = None,
+    include_total: bool = False,
+):
+    # Versão do conjunto de tarefas do usuário: qualquer INSERT/UPDATE muda
+    # o maior updated_at e qualquer DELETE muda a contagem
+    count, last_updated = (
+        await session.execute(
+            select(func.count(), func.max(Task.updated_at)).where(
+                Task.user_id == user_id
+            )
+        )
+    ).one()
+    etag = collection_etag(
+        user_id,
+        count,
+        last_updated,
+        sorted(request.query_params.multi_items()),
+    )
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+
+    query = list_tasks_query(
+        user_id,
+        session.bind.dialect.name,
+        title=title,
+        description=description,
+        state=state,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+        search=search,
+    )
+
+    tasks = await fetch_rows(
+        session,
+        query.with_only_columns(*public_columns(Task, TaskPublic, fields)),
+    )
+
+    content = {
+        'tasks': tasks,
+        'next_cursor': None if search else next_cursor(tasks, limit),
+    }
+
+    if include_total:
+        # Total do filtro inteiro, independente de offset/limit/cursor
+        total_query = list_tasks_query(
+            user_id,
+            session.bind.dialect.name,
+            title=title,
+            description=description,
+            state=state,
+            search=search,
+        )
+        text_filtered = title or description or search
+        total, is_estimate = await _count_tasks(
+            session,
+            total_query,
+            None if text_filtered else (user_id, state or None),
+        )
+        if is_estimate:
+            total, is_estimate = _reconcile_estimate(
+                total, len(tasks), offset, limit, cursor
+            )
+        content['total'], content['total_is_estimate'] = total, is_estimate
+
+    return ORJSONResponse(content, headers={'ETag': etag})
+
+
+@router.get('/stats', status_code=HTTPStatus.OK, response_model=TaskStats)
+async def task_stats(
+    session: T_Session, user_id: T_UserId, by_day: bool = False
+):
+    # GROUP BY atendido pelo índice (user_id, state, id)
+    counts = await session.execute(
+        select(Task.state, func.count())
+        .where(Task.user_id == user_id)
+        .group_by(Task.state)
+    )
+    by_state = dict.fromkeys(TaskState, 0) | dict(counts.all())
+
+    stats = {'total': sum(by_state.values()), 'by_state': by_state}
+
+    if by_day:
+        day = func.date(Task.created_at)
+        days = await session.execute(
+            select(day.label('day'), func.count().label('count'))
+            .where(Task.user_id == user_id)
+            .group_by(day)
+            .order_by(day)
+        )
+        stats['by_day'] = days.mappings().all()
+
+    return stats
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_tasks(
+    session: T_Session,
+    user_id: T_UserId,
+    export_format: Annotated[
+        Literal['ndjson', 'csv'], Query(alias='format')
+    ] = 'ndjson',
+):
+    columns = public_columns(Task, TaskPublic)
+    query = (
+        select(*columns)
+        .where(Task.user_id == user_id)
+        .order_by(Task.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    # A sessão da dependência é fechada antes do envio da resposta, então
+    # o streaming usa uma conexão própria do mesmo engine
+    engine = session.bind
+
+    async def partitions():
+        async with engine.connect() as conn:
+            # Cursor do lado do servidor: as linhas chegam em lotes
+            result = await conn.stream(query)
+            async for rows in result.mappings().partitions():
+                yield rows
+
+    if export_format == 'csv':
+        content = csv_chunks([column.key for column in columns], partitions())
+    else:
+        content = ndjson_chunks(partitions())
+
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="tasks.{export_format}"'
+            )
+        },
+    )
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return '; '.join(
+        f'{".".join(map(str, error["loc"]))}: {error["msg"]}'
+        for error in exc.errors()
+    )
+
+
+async def _insert_tasks(
+    session: AsyncSession, batch: list[tuple[int, dict]]
+) -> list[int]:
+    """Insere o lote (linha do arquivo, valores) na sua própria transação.
+
+    Retorna as linhas recusadas pelo banco (ex.: NUL no texto, que o
+    Postgres não aceita). Nesse caso o lote é refeito linha a linha, cada
+    uma em um SAVEPOINT, para importar as demais.
+    """
+    try:
+        await session.execute(insert(Task), [values for _, values in batch])
+        await session.commit()
+        return []
+    except SQLAlchemyError:
+        await session.rollback()
+
+    rejected = []
+    for row, values in batch:
+        try:
+            async with session.begin_nested():
+                await session.execute(insert(Task), [values])
+        except SQLAlchemyError:
+            rejected.append(row)
+    await session.commit()
+
+    return rejected
+
+
+@router.post(
+    '/import', status_code=HTTPStatus.OK, response_model=TaskImportReport
+)
+async def import_tasks(
+    file: UploadFile,
+    session: T_Session,
+    user_id: T_UserId,
+    import_format: Annotated[
+        Literal['ndjson', 'csv'], Query(alias='format')
+    ] = 'ndjson',
+):
+    # O upload já está em um arquivo temporário; ele é lido linha a linha
+    text_stream = TextIOWrapper(file.file, encoding='utf-8', newline='')
+    if import_format == 'csv':
+        records = iter_csv(text_stream)
+    else:
+        records = iter_ndjson(text_stream)
+
+    imported = 0
+    errors = []
+    failed = 0
+    batch = []
+
+    def record_error(row: int, detail: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({'row': row, 'detail': detail})
+
+    async def flush():
+        nonlocal imported
+        rejected = await _insert_tasks(session, batch)
+        imported += len(batch) - len(rejected)
+        for row in rejected:
+            record_error(row, 'Rejected by the database')
+        batch.clear()
+
+    try:
+        for row, record, parse_error in records:
+            detail = parse_error
+            if detail is None:
+                try:
+                    task = TaskSchema.model_validate(record)
+                except ValidationError as exc:
+                    detail = _format_validation_error(exc)
+
+            if detail is not None:
+                record_error(row, detail)
+                continue
+
+            batch.append((row, {**task.model_dump(), 'user_id': user_id}))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='File must be UTF-8 encoded',
+        )
+
+    if batch:
+        await flush()
+
+    # Erros ficam na ordem das linhas do arquivo
+    errors.sort(key=lambda error: error['row'])
+
+    if imported:
+        invalidate_task_counts(user_id)
+
+    return {'imported': imported, 'failed': failed, 'errors': errors}
+
+
+# As rotas /bulk precisam ser registradas antes das rotas /{task_id}
+@router.post('/bulk', status_code=HTTPStatus.CREATED, response_model=TaskList)
+async def create_tasks_bulk(
+    payload: TaskBulkCreate, session: T_Session, user_id: T_UserId
+):
+    # Um único INSERT com várias linhas, retornando os valores gerados
+    tasks = await session.scalars(
+        insert(Task).returning(Task, sort_by_parameter_order=True),
+        [{**task.model_dump(), 'user_id': user_id} for task in payload.tasks],
+    )
+    tasks = tasks.all()
+    await session.commit()
+    invalidate_task_counts(user_id)
 
     return {'tasks': tasks}
 
 
-@router.delete('/{task_id}', status_code=HTTPStatus.NO_CONTENT)
-def delete_task(task_id: int, session: T_Session, user: T_User):
-    task = session.scalar(
-        select(Task).where(Task.user_id == user.id, Task.id == task_id)
+@router.patch('/bulk', status_code=HTTPStatus.OK, response_model=TaskList)
+async def update_tasks_bulk(
+    payload: TaskBulkUpdate, session: T_Session, user_id: T_UserId
+):
+    values = payload.model_dump(exclude_unset=True, exclude={'ids'})
+    condition = (Task.user_id == user_id) & Task.id.in_(payload.ids)
+
+    if not values:
+        tasks = await session.scalars(
+            select(Task).where(condition).order_by(Task.id)
+        )
+        return {'tasks': tasks.all()}
+
+    tasks = await session.scalars(
+        update(Task).where(condition).values(**values).returning(Task)
+    )
+    tasks = tasks.all()
+    await session.commit()
+    invalidate_task_counts(user_id)
+
+    return {'tasks': sorted(tasks, key=lambda task: task.id)}
+
+
+@router.delete('/bulk', status_code=HTTPStatus.NO_CONTENT)
+async def delete_tasks_bulk(
+    payload: TaskBulkIds, session: T_Session, user_id: T_UserId
+):
+    await session.execute(
+        delete(Task).where(Task.user_id == user_id, Task.id.in_(payload.ids))
     )
+    await session.commit()
+    invalidate_task_counts(user_id)
+
+
+@router.delete('/{task_id}', status_code=HTTPStatus.NO_CONTENT)
+async def delete_task(task_id: int, session: T_Session, user_id: T_UserId):
+    task = await session.scalar(task_by_id_query(user_id, task_id))
 
     if not task:
         raise HTTPException(
@@ -69,31 +540,57 @@ def delete_task(task_id: int, session: T_Session, user: T_User):
             detail='Task not found',
         )
 
-    session.delete(task)
-    session.commit()
+    await session.delete(task)
+    await session.commit()
+    invalidate_task_counts(user_id)
 
 
 @router.patch(
     '/{task_id}', status_code=HTTPStatus.OK, response_model=TaskPublic
 )
-def update_task(
-    task_id: int, task: TaskUpdate, session: T_Session, user: T_User
+async def update_task(  # noqa: PLR0913, PLR0917
+    task_id: int,
+    task: TaskUpdate,
+    session: T_Session,
+    user_id: T_UserId,
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    db_task = session.scalar(
-        select(Task).where(Task.user_id == user.id, Task.id == task_id)
-    )
+    values = task.model_dump(exclude_unset=True)
+    query = task_by_id_query(user_id, task_id)
+
+    # If-Match: a versão esperada entra no próprio WHERE, sem corrida entre
+    # a verificação e a escrita
+    versions = if_match_versions(if_match)
+    if versions is not None:
+        query = query.where(Task.updated_at.in_(versions))
+
+    # UPDATE condicional único: se nenhuma linha for retornada, a tarefa
+    # não existe, pertence a outro usuário ou mudou desde o If-Match
+    if values:
+        db_task = await session.scalar(
+            update(Task)
+            .where(query.whereclause)
+            .values(**values)
+            .returning(Task)
+        )
+    else:
+        db_task = await session.scalar(query)
 
     if not db_task:
+        if versions is not None and await session.scalar(
+            task_by_id_query(user_id, task_id).with_only_columns(Task.id)
+        ):
+            raise precondition_failed()
+
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Task not found',
         )
 
-    for key, value in task.model_dump(exclude_unset=True).items():
-        setattr(db_task, key, value)
-
-    session.add(db_task)
-    session.commit()
-    session.refresh(db_task)
+    await session.commit()
+    if values:
+        invalidate_task_counts(user_id)
 
+    response.headers['ETag'] = resource_etag(db_task.updated_at)
     return db_task
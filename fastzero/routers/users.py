@@ -1,16 +1,35 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import or_, select
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+)
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastzero.database import get_session
+from fastzero.etags import (
+    collection_etag,
+    etag_matches,
+    if_match_versions,
+    not_modified,
+    precondition_failed,
+    resource_etag,
+)
 from fastzero.models import User
+from fastzero.pagination import decode_cursor, next_cursor
+from fastzero.refresh_tokens import revoke_user_tokens
+from fastzero.responses import ORJSONResponse, fetch_rows, public_columns
 from fastzero.schemas import UserList, UserPublic, UserSchema
 from fastzero.security import (
     get_current_user,
-    get_password_hash,
+    get_password_hash_async,
+    invalidate_cached_user,
 )
 
 router = APIRouter(
@@ -19,13 +38,13 @@ router = APIRouter(
     # Parâmetro para organizar as rotas na documentação
     tags=['users'],
 )
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
 T_CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
-def create_user(user: UserSchema, session: T_Session):
-    db_user = session.scalar(
+async def create_user(user: UserSchema, session: T_Session):
+    db_user = await session.scalar(
         select(User).where(
             or_(User.username == user.username, User.email == user.email)
         )
@@ -47,60 +66,127 @@ def create_user(user: UserSchema, session: T_Session):
         username=user.username,
         email=user.email,
         # Persiste a senha encriptada no banco de dados
-        password=get_password_hash(user.password),
+        password=await get_password_hash_async(user.password),
     )
 
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
 
     return db_user
 
 
-@router.get('/', status_code=HTTPStatus.OK, response_model=UserList)
-def get_users(session: T_Session, limit: int = 10, skip: int = 0):
-    users = session.scalars(select(User).limit(limit).offset(skip))
-    return {'users': users}
+@router.get(
+    '/',
+    status_code=HTTPStatus.OK,
+    response_model=UserList,
+    response_class=ORJSONResponse,
+)
+async def get_users(
+    request: Request,
+    session: T_Session,
+    limit: int = 10,
+    skip: int = 0,
+    cursor: str | None = None,
+):
+    count, last_updated = (
+        await session.execute(select(func.count(), func.max(User.updated_at)))
+    ).one()
+    etag = collection_etag(
+        count, last_updated, sorted(request.query_params.multi_items())
+    )
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+
+    query = select(*public_columns(User, UserPublic))
+
+    # Paginação por cursor (keyset): evita varrer as linhas do offset
+    if cursor:
+        query = query.where(User.id > decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+
+    users = await fetch_rows(session, query.order_by(User.id).limit(limit))
+
+    return ORJSONResponse(
+        {'users': users, 'next_cursor': next_cursor(users, limit)},
+        headers={'ETag': etag},
+    )
 
 
 @router.get('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
-def get_user_by_id(user_id: int, session: T_Session):
-    db_user = session.get(User, user_id)
+async def get_user_by_id(
+    user_id: int,
+    session: T_Session,
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    db_user = await session.get(User, user_id)
 
     if not db_user:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='User not found'
         )
 
+    etag = resource_etag(db_user.updated_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    response.headers['ETag'] = etag
     return db_user
 
 
 @router.put('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
-def update_user(
+async def update_user(
     user_id: int,
     user: UserSchema,
     session: T_Session,
     # Essa dependência verifica se o usuário está logado
     current_user: T_CurrentUser,
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ):
     if current_user.id != user_id:
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
-    current_user.username = user.username
-    current_user.email = user.email
-    current_user.password = get_password_hash(user.password)
+    query = update(User).where(User.id == user_id)
+
+    # If-Match: a versão esperada entra no próprio WHERE. O usuário
+    # autenticado pode vir do cache, então não comparamos com ele
+    versions = if_match_versions(if_match)
+    if versions is not None:
+        query = query.where(User.updated_at.in_(versions))
 
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    # O UPDATE ... RETURNING atualiza o próprio current_user (mesma
+    # identidade na sessão), então o email antigo é guardado antes
+    old_email = current_user.email
 
-    return current_user
+    db_user = await session.scalar(
+        query.values(
+            username=user.username,
+            email=user.email,
+            password=await get_password_hash_async(user.password),
+        ).returning(User)
+    )
+
+    if not db_user:
+        raise precondition_failed()
+
+    # O email mudou e os refresh tokens carregam o antigo: nova sessão
+    await revoke_user_tokens(session, user_id)
+    await session.commit()
+    # Só depois do commit: antes dele uma requisição concorrente ainda lê
+    # (e guardaria no cache) a linha antiga
+    invalidate_cached_user(old_email)
+    invalidate_cached_user(db_user.email)
+
+    response.headers['ETag'] = resource_etag(db_user.updated_at)
+    return db_user
 
 
 @router.delete('/{user_id}', status_code=HTTPStatus.NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: int,
     session: T_Session,
     current_user: T_CurrentUser,
@@ -110,5 +196,7 @@ def delete_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
-    session.delete(current_user)
-    session.commit()
+    await revoke_user_tokens(session, user_id)
+    await session.delete(current_user)
+    await session.commit()
+    invalidate_cached_user(current_user.email)
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 from fastzero.models import TaskState
 
@@ -9,6 +9,13 @@ class Message(BaseModel):
     message: str
 
 
+class PoolStatus(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+
+
 class UserSchema(BaseModel):
     username: str
     email: EmailStr
@@ -27,11 +34,17 @@ class UserPublic(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
 
 
 class Token(BaseModel):
     token_type: str  # modelo que o cliente deve usar para autorização
     access_token: str  # token jwt que será gerado
+    refresh_token: str | None = None  # usado em /auth/refresh/token
+
+
+class RefreshTokenSchema(BaseModel):
+    refresh_token: str
 
 
 class TaskSchema(BaseModel):
@@ -49,9 +62,51 @@ class TaskPublic(TaskSchema):
 
 class TaskList(BaseModel):
     tasks: list[TaskPublic]
+    next_cursor: str | None = None
+    # Presentes apenas com include_total=true
+    total: int | None = None
+    total_is_estimate: bool | None = None
 
 
 class TaskUpdate(BaseModel):
     title: str | None = None
     description: str | None = None
     state: TaskState | None = None
+
+
+# Limite de itens por requisição nos endpoints em lote
+BULK_MAX_ITEMS = 1000
+
+
+class TaskBulkCreate(BaseModel):
+    tasks: list[TaskSchema] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class TaskBulkIds(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class TaskBulkUpdate(TaskUpdate, TaskBulkIds):
+    pass
+
+
+class TaskImportError(BaseModel):
+    row: int
+    detail: str
+
+
+class TaskImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: list[TaskImportError]
+
+
+class TaskDayCount(BaseModel):
+    day: date
+    count: int
+
+
+class TaskStats(BaseModel):
+    total: int
+    by_state: dict[TaskState, int]
+    by_day: list[TaskDayCount] | None = None
@@ -1,32 +1,207 @@
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import cache
 from http import HTTPStatus
+from time import monotonic, perf_counter, time
 from zoneinfo import ZoneInfo
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from jwt import decode, encode
 from jwt.exceptions import ExpiredSignatureError, PyJWTError
 from pwdlib import PasswordHash
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from fastzero.cache import TTLCache
 from fastzero.database import get_session
+from fastzero.metrics import PASSWORD_HASH_DURATION
 from fastzero.models import User
-from fastzero.settings import Settings
+from fastzero.settings import get_settings
 
-pwd_context = PasswordHash.recommended()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
-settings = Settings()
+settings = get_settings()
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+# Chave e algoritmos preparados uma vez, e não a cada encode/decode
+JWT_KEY = settings.SECRET_KEY.encode()
+JWT_ALGORITHMS = [settings.ALGORITHM]
+
+
+# Construído no primeiro uso (ou no lifespan), não na importação
+@cache
+def get_password_context() -> PasswordHash:
+    return PasswordHash.recommended()
 
 
 # Encriptação de senha
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_password_context().hash(password)
 
 
 # Verifica se a senha limpa e a senha encriptada são iguais
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_context().verify(plain_password, hashed_password)
+
+
+# Hash usado no login de emails inexistentes, para que a resposta custe o
+# mesmo que uma senha errada e não revele quais emails estão cadastrados
+@cache
+def dummy_password_hash():
+    return get_password_hash('dummy-password')
+
+
+class PasswordHashPool:
+    """Executa o argon2 em um pool de threads com fila limitada.
+
+    O argon2 libera a GIL, então as threads rodam em paralelo sem travar
+    o event loop. Quando a fila enche, a requisição é recusada com 503
+    em vez de esperar e atrasar os outros endpoints do worker.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='argon2'
+        )
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Server busy, try again later',
+                headers={'Retry-After': '1'},
+            )
+
+        def timed():
+            start = perf_counter()
+            try:
+                return func(*args)
+            finally:
+                PASSWORD_HASH_DURATION.observe(
+                    perf_counter() - start, operation=func.__name__
+                )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+
+
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+class LoginThrottle:
+    """Conta falhas de login por conta e por IP, com backoff exponencial.
+
+    Enquanto uma chave estiver bloqueada o login é recusado antes da
+    consulta ao banco e do argon2. Os contadores ficam em memória, por
+    worker, e são esquecidos após `window` segundos sem novas falhas.
+    """
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        max_failures: int,
+        max_failures_per_ip: int,
+        lockout: float,
+        max_lockout: float,
+        window: float,
+        maxsize: int = 10_000,
+    ):
+        self.max_failures = {
+            'account': max_failures,
+            'ip': max_failures_per_ip,
+        }
+        self.lockout = lockout
+        self.max_lockout = max_lockout
+        self._failures = TTLCache(maxsize=maxsize, ttl=window)
+
+    @staticmethod
+    def keys(email: str, ip: str) -> list[str]:
+        return [f'account:{email.lower()}', f'ip:{ip}']
+
+    def retry_after(self, keys: list[str]) -> float:
+        now = monotonic()
+        locked_until = max(self._failures.get(key, (0, 0))[1] for key in keys)
+        return max(locked_until - now, 0)
+
+    def record_failure(self, keys: list[str]):
+        now = monotonic()
+        for key in keys:
+            failures = self._failures.get(key, (0, 0))[0] + 1
+            max_failures = self.max_failures[key.split(':', 1)[0]]
+
+            locked_until = 0
+            if max_failures and failures >= max_failures:
+                locked_until = now + min(
+                    self.lockout * 2 ** (failures - max_failures),
+                    self.max_lockout,
+                )
+            self._failures.set(key, (failures, locked_until))
+
+    # Só a conta é liberada: um login válido não zera as falhas do IP
+    def record_success(self, keys: list[str]):
+        self._failures.delete(keys[0])
+
+    def check(self, keys: list[str]):
+        retry_after = self.retry_after(keys)
+        if retry_after:
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail='Too many login attempts, try again later',
+                headers={'Retry-After': str(math.ceil(retry_after))},
+            )
+
+    def clear(self):
+        self._failures.clear()
+
+
+login_throttle = LoginThrottle(
+    max_failures=settings.LOGIN_MAX_FAILURES,
+    max_failures_per_ip=settings.LOGIN_MAX_FAILURES_PER_IP,
+    lockout=settings.LOGIN_LOCKOUT_SECONDS,
+    max_lockout=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+    window=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+)
+
+
+def client_ip(request: Request) -> str:
+    """IP do cliente para o bloqueio de login e o rate limiting.
+
+    Com CLIENT_IP_HEADER usa o cabeçalho que o proxy da borda sobrescreve
+    (ex.: Fly-Client-IP), que o cliente não consegue forjar. Sem ele vale o
+    endereço da conexão, já resolvido pelo uvicorn a partir do
+    X-Forwarded-For dos proxies em SERVER_FORWARDED_ALLOW_IPS.
+    """
+    if settings.CLIENT_IP_HEADER:
+        ip = request.headers.get(settings.CLIENT_IP_HEADER, '').strip()
+        if ip:
+            return ip
+
+    return request.client.host if request.client else 'unknown'
+
+
+async def get_password_hash_async(password: str):
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await password_hash_pool.run(
+        verify_password, plain_password, hashed_password
+    )
 
 
 # Criação do token
@@ -40,42 +215,120 @@ def create_access_token(data_payload: dict):
     to_encode.update({'exp': expire})
 
     # token = payload + secret_key + algoritmo de assinatura
-    encoded_jwt = encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
+    encoded_jwt = encode(to_encode, JWT_KEY, algorithm=settings.ALGORITHM)
 
     return encoded_jwt
 
 
-# Capturar usuário que está logado
-async def get_current_user(
-    session: Session = Depends(get_session),
-    # Com essa depndência, qualquer usuário que for fazer essa operação
-    # precisa estar logado
-    token: str = Depends(oauth2_scheme),
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
-    try:
-        payload = decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get('sub')
 
-        if not username:
-            raise credentials_exception
+# Decodifica e valida o token, retornando os claims
+def _decode_access_token(token: str) -> dict:
+    try:
+        payload = decode(token, JWT_KEY, algorithms=JWT_ALGORITHMS)
     except ExpiredSignatureError:
-        raise credentials_exception
+        raise _credentials_exception()
     except PyJWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    if not payload.get('sub'):
+        raise _credentials_exception()
+
+    return payload
+
+
+# Clientes repetem o mesmo token em muitas requisições: os claims de um
+# token já verificado são reaproveitados até o `exp`. Tokens inválidos
+# nunca entram no cache. Os claims retornados não devem ser alterados
+def decode_access_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is not None and payload.get('exp', math.inf) > time():
+        return payload
+
+    payload = _decode_access_token(token)
+    token_cache.set(token, payload)
+
+    return payload
+
+
+def _user_to_cache(user: User) -> dict:
+    return {
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+    }
+
+
+def _user_from_cache(data: dict) -> User:
+    user = User(
+        username=data['username'],
+        password=data['password'],
+        email=data['email'],
+    )
+    user.id = data['id']
+    user.created_at = data['created_at']
+    user.updated_at = data['updated_at']
+
+    # Marca o objeto como já persistido, sem histórico de alterações
+    make_transient_to_detached(user)
+
+    return user
+
+
+# Deve ser chamado sempre que o usuário for alterado ou removido
+def invalidate_cached_user(email: str):
+    user_cache.delete(email)
+
 
-    user = session.scalar(select(User).where(User.email == username))
+async def _get_user_by_email(session: AsyncSession, email: str):
+    cached = user_cache.get(email)
+    if cached is not None:
+        # load=False associa o objeto à sessão sem fazer SELECT
+        return await session.merge(_user_from_cache(cached), load=False)
+
+    user = await session.scalar(select(User).where(User.email == email))
+    if user:
+        user_cache.set(email, _user_to_cache(user))
+
+    return user
+
+
+# Capturar usuário que está logado
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    # Com essa depndência, qualquer usuário que for fazer essa operação
+    # precisa estar logado
+    token: str = Depends(oauth2_scheme),
+):
+    payload = decode_access_token(token)
+
+    user = await _get_user_by_email(session, payload['sub'])
 
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
+
+
+# Retorna apenas o id do usuário logado, usando o claim `uid` do token
+# quando TOKEN_USER_ID_CLAIM estiver habilitado
+async def get_current_user_id(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+) -> int:
+    payload = decode_access_token(token)
+
+    if settings.TOKEN_USER_ID_CLAIM and payload.get('uid'):
+        return payload['uid']
+
+    user = await _get_user_by_email(session, payload['sub'])
+
+    if not user:
+        raise _credentials_exception()
+
+    return user.id
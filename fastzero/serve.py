@@ -0,0 +1,71 @@
+"""Inicialização do servidor em produção.
+
+Uso:
+    python -m fastzero.serve            # inicia os workers
+    python -m fastzero.serve migrate    # aplica as migrações e sai
+
+Com mais de um worker o processo pai do uvicorn reinicia os workers um
+de cada vez ao receber SIGHUP (restart sem derrubar o socket) e aumenta
+ou diminui a quantidade com SIGTTIN/SIGTTOU.
+"""
+
+import argparse
+import os
+from importlib.util import find_spec
+from pathlib import Path
+
+import uvicorn
+from alembic import command
+from alembic.config import Config
+
+from fastzero.settings import Settings, get_settings
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def available_cpus() -> int:
+    # Respeita o limite de CPUs do container quando disponível
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def uvicorn_options(settings: Settings) -> dict:
+    return {
+        'host': settings.SERVER_HOST,
+        'port': settings.SERVER_PORT,
+        'workers': settings.SERVER_WORKERS or available_cpus(),
+        'loop': 'uvloop' if find_spec('uvloop') else 'asyncio',
+        'http': 'httptools' if find_spec('httptools') else 'h11',
+        'timeout_graceful_shutdown': settings.SERVER_GRACEFUL_TIMEOUT,
+        'proxy_headers': True,
+        'forwarded_allow_ips': settings.SERVER_FORWARDED_ALLOW_IPS,
+    }
+
+
+def migrate():
+    config = Config(str(BASE_DIR / 'alembic.ini'))
+    config.set_main_option('script_location', str(BASE_DIR / 'migrations'))
+    command.upgrade(config, 'head')
+
+
+def serve():
+    uvicorn.run('fastzero.app:app', **uvicorn_options(get_settings()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fastzero.serve')
+    parser.add_argument(
+        'command', nargs='?', default='serve', choices=['serve', 'migrate']
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        migrate()
+    else:
+        serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
+from functools import cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,3 +12,78 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    # Pool dedicado ao argon2 (hash/verify de senhas)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Refresh tokens e sincronização da lista de revogação entre workers
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_REVOCATION_SYNC_SECONDS: int = 30
+
+    # Proteção contra força bruta no login: após N falhas seguidas a conta
+    # (ou o IP) fica bloqueada por um tempo que dobra a cada nova falha
+    LOGIN_MAX_FAILURES: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 20
+    LOGIN_LOCKOUT_SECONDS: float = 1
+    LOGIN_LOCKOUT_MAX_SECONDS: float = 900
+    # Falhas mais antigas que a janela são esquecidas
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 900
+
+    # Cache de tokens já verificados (token -> claims), limitado pelo `exp`
+    TOKEN_CACHE_SIZE: int = 4096
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+
+    # Cache do usuário autenticado (chave: `sub` do token)
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+    # Usa o claim `uid` do token para evitar a busca do usuário no banco
+    TOKEN_USER_ID_CLAIM: bool = False
+
+    # Pool de conexões (aplicado apenas ao Postgres)
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = False
+    # Em milissegundos; 0 desabilita
+    DATABASE_STATEMENT_TIMEOUT: int = 0
+    # Compatível com PgBouncer em modo transaction (sem prepared statements)
+    DATABASE_PGBOUNCER: bool = False
+
+    # Servidor de produção (python -m fastzero.serve)
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 8000
+    # 0 usa um worker por núcleo disponível
+    SERVER_WORKERS: int = 0
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    # Proxies confiáveis (IPs/redes separados por vírgula, ou *): deles o
+    # X-Forwarded-For vira o IP do cliente, usado no rate limiting e no
+    # bloqueio de login por IP
+    SERVER_FORWARDED_ALLOW_IPS: str = '127.0.0.1'
+    # Cabeçalho com o IP do cliente definido pelo proxy da borda (ex.:
+    # Fly-Client-IP); tem precedência sobre o endereço da conexão
+    CLIENT_IP_HEADER: str = ''
+
+    # Log de queries lentas em milissegundos; 0 desabilita
+    SLOW_QUERY_THRESHOLD_MS: float = 0
+    # Máximo de queries por requisição antes de alertar (N+1); 0 desabilita
+    QUERY_BUDGET_PER_REQUEST: int = 0
+
+    # Cache das contagens de tarefas por usuário (include_total)
+    TASK_COUNT_CACHE_SIZE: int = 4096
+    TASK_COUNT_CACHE_TTL_SECONDS: int = 30
+
+    # Rate limiting. Regras no formato "<limite>/<período>" por rota, ex.:
+    # RATE_LIMITS='{"POST /auth/token": "5/minute"}'
+    # O padrão vale para as rotas sem regra própria; vazio desabilita
+    RATE_LIMIT_DEFAULT: str = ''
+    RATE_LIMITS: dict[str, str] = {}
+    # memory: contadores por worker; database: compartilhados entre workers
+    RATE_LIMIT_BACKEND: Literal['memory', 'database'] = 'memory'
+
+
+# Instância única: o .env é lido e validado uma vez por processo
+@cache
+def get_settings() -> Settings:
+    return Settings()
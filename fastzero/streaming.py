@@ -0,0 +1,69 @@
+# Codificação e leitura de linhas em NDJSON/CSV, sem carregar o arquivo
+# inteiro em memória
+import csv
+from datetime import datetime
+from enum import Enum
+from io import StringIO
+
+import orjson
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _csv_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def ndjson_chunks(partitions):
+    async for rows in partitions:
+        yield b''.join(orjson.dumps(dict(row)) + b'\n' for row in rows)
+
+
+async def csv_chunks(columns: list[str], partitions):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    async for rows in partitions:
+        writer.writerows(
+            [_csv_value(row[column]) for column in columns] for row in rows
+        )
+        yield buffer.getvalue()
+        # Reaproveita o buffer para manter a memória constante
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# Os leitores abaixo produzem (número da linha, registro, erro)
+
+
+def iter_ndjson(text_stream):
+    for row, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield row, None, 'Invalid JSON'
+            continue
+
+        if not isinstance(record, dict):
+            yield row, None, 'Expected a JSON object'
+            continue
+
+        yield row, record, None
+
+
+def iter_csv(text_stream):
+    # Linha 1 é o cabeçalho; campos com quebra de linha ocupam mais de uma
+    # linha física, então a numeração é por registro
+    for row, record in enumerate(csv.DictReader(text_stream), start=2):
+        yield row, record, None
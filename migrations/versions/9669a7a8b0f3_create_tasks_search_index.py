@@ -0,0 +1,39 @@
+"""create tasks search index
+
+Revision ID: 9669a7a8b0f3
+Revises: f9036c95a668
+Create Date: 2026-10-18 08:45:10.214577
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9669a7a8b0f3'
+down_revision: Union[str, None] = 'f9036c95a668'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Índice GIN da busca textual (apenas Postgres). A expressão precisa
+    # ser idêntica a fastzero.models.TASK_SEARCH_DOCUMENT
+    if op.get_context().dialect.name != 'postgresql':
+        return
+
+    op.create_index(
+        'ix_tasks_search',
+        'tasks',
+        [sa.text("to_tsvector('simple'::regconfig, title || ' ' || description)")],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_tasks_search', table_name='tasks')
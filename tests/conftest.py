@@ -4,15 +4,25 @@ from datetime import datetime
 import factory
 import factory.fuzzy
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
+from fastzero import app as app_module
 from fastzero.app import app
 from fastzero.database import get_session
 from fastzero.models import Task, TaskState, User, table_registry
-from fastzero.security import get_password_hash
+from fastzero.querylog import query_budget
+from fastzero.refresh_tokens import revocation_list
+from fastzero.routers.tasks import task_count_cache
+from fastzero.security import (
+    get_password_hash,
+    login_throttle,
+    token_cache,
+    user_cache,
+)
 
 
 class UserFactory(factory.Factory):
@@ -34,6 +44,32 @@ class TaskFactory(factory.Factory):
     user_id = 1
 
 
+# Os caches são globais ao processo, mas o banco é recriado a cada teste
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    user_cache.clear()
+    task_count_cache.clear()
+    login_throttle.clear()
+    token_cache.clear()
+    revocation_list.clear()
+    yield
+    user_cache.clear()
+    task_count_cache.clear()
+    login_throttle.clear()
+    token_cache.clear()
+    revocation_list.clear()
+
+
+# Sessões abertas fora das rotas (ex.: lifespan) usam o banco dos testes
+@pytest.fixture(autouse=True)
+def lifespan_sessions(engine, monkeypatch):
+    monkeypatch.setattr(
+        app_module,
+        'new_session',
+        lambda: AsyncSession(engine, expire_on_commit=False),
+    )
+
+
 # Arrange
 @pytest.fixture
 def client(session):
@@ -50,50 +86,50 @@ def client(session):
 @pytest.fixture(scope='session')
 def engine():
     with PostgresContainer('postgres:16', driver='psycopg') as postgres:
-        _engine = create_engine(postgres.get_connection_url())
+        _engine = create_async_engine(postgres.get_connection_url())
+        yield _engine
 
-        with _engine.begin():
-            yield _engine
 
-
-@pytest.fixture
-def session(engine):
+@pytest_asyncio.fixture
+async def session(engine):
     # Cria todas as definicções do banco e depois apaga tudo
-    table_registry.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
 
-    with Session(engine) as session:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         # yield faz com que a função pare na linha abaixo retornando
         # a session, depois que o teste terminar
         # o código abaixo do yield é executado
         yield session
 
-    table_registry.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
 
 
-@pytest.fixture
-def user(session):
+@pytest_asyncio.fixture
+async def user(session):
     pwd = 'senhateste'
     user = UserFactory(
         password=get_password_hash(pwd),
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = pwd
 
     return user
 
 
-@pytest.fixture
-def user2(session):
+@pytest_asyncio.fixture
+async def user2(session):
     pwd = 'senhateste'
     user = UserFactory(
         password=get_password_hash(pwd),
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = pwd
 
@@ -127,3 +163,12 @@ def _mock_db_time(*, model, time=datetime(2024, 1, 1)):
 @pytest.fixture
 def mock_db_time():
     return _mock_db_time
+
+
+# Falha o teste se o bloco executar mais queries do que o orçamento
+@pytest.fixture
+def max_queries(engine):
+    def _max_queries(n):
+        return query_budget(engine, n)
+
+    return _max_queries
@@ -6,3 +6,10 @@ def test_read_root_deve_retornar_ok_e_ola_mundo(client):
 
     assert response.status_code == HTTPStatus.OK  # Assert
     assert response.json() == {'message': 'Hello World'}  # Assert
+
+
+def test_read_pool_status(client):
+    response = client.get('/health/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    assert set(response.json()) == {'size', 'checked_out', 'idle', 'overflow'}
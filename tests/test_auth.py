@@ -1,8 +1,21 @@
+import math
 from http import HTTPStatus
+from time import time
 
+import pytest
+from fastapi.testclient import TestClient
 from freezegun import freeze_time
+from sqlalchemy import Select
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
-from fastzero.security import create_access_token
+from fastzero.app import app, lifespan
+from fastzero.refresh_tokens import RevocationList, revocation_list
+from fastzero.security import (
+    create_access_token,
+    login_throttle,
+    password_hash_pool,
+    settings,
+)
 
 
 def test_get_token(client, user):
@@ -102,10 +115,22 @@ def test_token_expired_after_time(client, user):
         assert response.json() == {'detail': 'Could not validate credentials'}
 
 
-def test_refresh_token(client, token):
+def _login(client, user):
+    return client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    ).json()
+
+
+def test_get_token_returns_refresh_token(client, user):
+    assert 'refresh_token' in _login(client, user)
+
+
+def test_refresh_token(client, user):
+    refresh_token = _login(client, user)['refresh_token']
+
     response = client.post(
-        '/auth/refresh/token',
-        headers={'Authorization': f'Bearer {token}'},
+        '/auth/refresh/token', json={'refresh_token': refresh_token}
     )
 
     data = response.json()
@@ -114,22 +139,289 @@ def test_refresh_token(client, token):
     assert 'token_type' in data
     assert data['token_type'] == 'Bearer'
     assert 'access_token' in data
+    assert data['refresh_token'] != refresh_token
+
+    response = client.get(
+        '/tasks/', headers={'Authorization': f'Bearer {data["access_token"]}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_refresh_token_without_db_queries(client, user, max_queries):
+    refresh_token = _login(client, user)['refresh_token']
+    # A primeira renovação sincroniza a lista de revogação
+    refresh_token = client.post(
+        '/auth/refresh/token', json={'refresh_token': refresh_token}
+    ).json()['refresh_token']
+
+    with max_queries(0):
+        response = client.post(
+            '/auth/refresh/token', json={'refresh_token': refresh_token}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_access_token_is_not_a_refresh_token(client, token):
+    response = client.post(
+        '/auth/refresh/token', json={'refresh_token': token}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'Invalid refresh token'}
+
+
+def test_refresh_token_reuse_revokes_family(client, user):
+    refresh_token = _login(client, user)['refresh_token']
+    new_refresh_token = client.post(
+        '/auth/refresh/token', json={'refresh_token': refresh_token}
+    ).json()['refresh_token']
+
+    response = client.post(
+        '/auth/refresh/token', json={'refresh_token': refresh_token}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    # O token legítimo mais novo também deixa de valer
+    response = client.post(
+        '/auth/refresh/token', json={'refresh_token': new_refresh_token}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_logout_revokes_refresh_token(client, user):
+    refresh_token = _login(client, user)['refresh_token']
+    other_session = _login(client, user)['refresh_token']
+
+    response = client.post(
+        '/auth/logout', json={'refresh_token': refresh_token}
+    )
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = client.post(
+        '/auth/refresh/token', json={'refresh_token': refresh_token}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    response = client.post(
+        '/auth/refresh/token', json={'refresh_token': other_session}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_update_user_revokes_refresh_tokens(client, user):
+    tokens = _login(client, user)
+
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {tokens["access_token"]}'},
+        json={
+            'username': 'test-username',
+            'email': 'test@email.com',
+            'password': 'test-password',
+        },
+    )
+
+    response = client.post(
+        '/auth/refresh/token', json={'refresh_token': tokens['refresh_token']}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_sync(session):
+    revocation_list.revoke('family:abc', 2, time() + 60)
+    await revocation_list.sync(session, force=True)
+
+    # Outro worker recebe a revogação na sincronização
+    other_worker = RevocationList(sync_interval=30)
+    await other_worker.sync(session)
+
+    claims = {'fam': 'abc', 'uid': 1, 'auth_time': 0}
+    assert other_worker.is_revoked({**claims, 'gen': 2})
+    assert not other_worker.is_revoked({**claims, 'gen': 3})
+
+
+@pytest.mark.asyncio
+async def test_revoke_now_during_sync_is_kept(session, monkeypatch):
+    execute = session.execute
+
+    # Logout concorrente: grava a revogação enquanto a sincronização
+    # espera a leitura da tabela
+    async def execute_with_logout(statement, *args, **kwargs):
+        result = await execute(statement, *args, **kwargs)
+        if isinstance(statement, Select):
+            await revocation_list.revoke_now(
+                session, 'family:abc', math.inf, time() + 60
+            )
+        return result
+
+    monkeypatch.setattr(session, 'execute', execute_with_logout)
+    await revocation_list.sync(session, force=True)
+
+    claims = {'fam': 'abc', 'uid': 1, 'auth_time': 0, 'gen': 5}
+    assert revocation_list.is_revoked(claims)
+
+
+@pytest.mark.asyncio
+async def test_pending_revocations_are_saved_on_shutdown(session):
+    async with lifespan(app):
+        # Renovação feita neste worker, ainda só na memória
+        revocation_list.revoke('family:abc', 2, time() + 60)
+
+    other_worker = RevocationList(sync_interval=30)
+    await other_worker.sync(session)
+
+    claims = {'fam': 'abc', 'uid': 1, 'auth_time': 0}
+    assert other_worker.is_revoked({**claims, 'gen': 2})
 
 
 def test_token_expired_dont_refresh(client, user):
     with freeze_time('2021-01-01 12:00:00'):
+        refresh_token = _login(client, user)['refresh_token']
+
+    with freeze_time('2021-02-01 12:00:00'):
+        response = client.post(
+            '/auth/refresh/token', json={'refresh_token': refresh_token}
+        )
+
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        assert response.json() == {'detail': 'Invalid refresh token'}
+
+
+def test_login_hash_pool_saturated(client, user, monkeypatch):
+    monkeypatch.setattr(password_hash_pool, 'max_pending', 0)
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Server busy, try again later'}
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_login_locked_after_failures_skips_argon2(client, user, monkeypatch):
+    monkeypatch.setitem(login_throttle.max_failures, 'account', 2)
+    data = {'username': user.email, 'password': 'wrongpassword'}
+
+    for _ in range(2):
+        response = client.post('/auth/token', data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def fail(*args):
+        raise AssertionError('argon2 should not run for locked accounts')
+
+    monkeypatch.setattr(password_hash_pool, 'run', fail)
+
+    # Nem a senha correta é aceita enquanto a conta estiver bloqueada
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json() == {
+        'detail': 'Too many login attempts, try again later'
+    }
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_login_lockout_backoff_doubles(client, user, monkeypatch):
+    monkeypatch.setitem(login_throttle.max_failures, 'account', 1)
+    data = {'username': user.email, 'password': 'wrongpassword'}
+
+    with freeze_time('2025-01-01 12:00:00') as frozen:
+        client.post('/auth/token', data=data)
+        frozen.tick(1)
+        client.post('/auth/token', data=data)
+
+        response = client.post('/auth/token', data=data)
+        assert response.headers['Retry-After'] == '2'
+
+        frozen.tick(2)
         response = client.post(
             '/auth/token',
             data={'username': user.email, 'password': user.clean_password},
         )
         assert response.status_code == HTTPStatus.OK
-        token = response.json()['access_token']
 
-    with freeze_time('2021-01-01 12:31:00'):
-        response = client.post(
-            '/auth/refresh/token',
-            headers={'Authorization': f'Bearer {token}'},
+
+def test_login_lockout_per_ip(client, user, monkeypatch):
+    monkeypatch.setitem(login_throttle.max_failures, 'ip', 2)
+
+    for email in ['a@test.com', 'b@test.com']:
+        client.post(
+            '/auth/token', data={'username': email, 'password': 'wrong'}
         )
 
-        assert response.status_code == HTTPStatus.UNAUTHORIZED
-        assert response.json() == {'detail': 'Could not validate credentials'}
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_login_lockout_per_ip_ignores_spoofed_forwarded_for(
+    client, monkeypatch
+):
+    monkeypatch.setitem(login_throttle.max_failures, 'ip', 2)
+    # O uvicorn confia só nos proxies configurados e usa o último hop não
+    # confiável do X-Forwarded-For, não o primeiro (controlado pelo cliente)
+    behind_proxy = TestClient(
+        ProxyHeadersMiddleware(app, trusted_hosts='testclient, 10.0.0.0/8')
+    )
+
+    def login(forwarded_for):
+        return behind_proxy.post(
+            '/auth/token',
+            headers={'X-Forwarded-For': forwarded_for},
+            data={'username': 'nobody@test.com', 'password': 'wrong'},
+        )
+
+    login('6.6.6.6, 203.0.113.7, 10.0.0.2')
+    login('6.6.6.7, 203.0.113.7')
+
+    response = login('6.6.6.8, 203.0.113.7')
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+    response = login('203.0.113.7, 198.51.100.1')
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_login_lockout_per_ip_uses_client_ip_header(client, monkeypatch):
+    monkeypatch.setitem(login_throttle.max_failures, 'ip', 2)
+    monkeypatch.setattr(settings, 'CLIENT_IP_HEADER', 'Fly-Client-IP')
+
+    def login(ip, forwarded_for):
+        return client.post(
+            '/auth/token',
+            headers={'Fly-Client-IP': ip, 'X-Forwarded-For': forwarded_for},
+            data={'username': 'nobody@test.com', 'password': 'wrong'},
+        )
+
+    login('203.0.113.7', '6.6.6.6')
+    login('203.0.113.7', '6.6.6.7')
+
+    response = login('203.0.113.7', '6.6.6.8')
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+    response = login('198.51.100.1', '6.6.6.8')
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_login_unknown_email_runs_dummy_verify(client, monkeypatch):
+    calls = []
+
+    async def run(func, *args):
+        calls.append(func.__name__)
+        return func(*args)
+
+    monkeypatch.setattr(password_hash_pool, 'run', run)
+
+    response = client.post(
+        '/auth/token', data={'username': 'nobody@test.com', 'password': 'x'}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert calls == ['verify_password']
@@ -0,0 +1,43 @@
+from freezegun import freeze_time
+
+from fastzero.cache import TTLCache
+
+
+def test_cache_get_set():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    cache.get('a')
+    cache.set('c', 'C')
+
+    assert cache.get('a') == 'A'
+    assert cache.get('b') is None
+    assert cache.get('c') == 'C'
+
+
+def test_cache_entry_expires():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    with freeze_time('2025-01-01 12:00:00'):
+        cache.set('a', 1)
+
+    with freeze_time('2025-01-01 12:01:01'):
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+
+def test_cache_delete():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.delete('a')
+    cache.delete('missing')
+
+    assert cache.get('a') is None
@@ -0,0 +1,42 @@
+from http import HTTPStatus
+
+from fastzero.metrics import REGISTRY, Histogram
+
+
+def test_histogram_render():
+    histogram = Histogram('test_seconds', 'Test.', ['op'], buckets=(1, 5))
+    REGISTRY.remove(histogram)
+
+    histogram.observe(0.5, op='a')
+    histogram.observe(3, op='a')
+
+    assert histogram.render() == [
+        '# HELP test_seconds Test.',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{op="a",le="1"} 1',
+        'test_seconds_bucket{op="a",le="5"} 2',
+        'test_seconds_bucket{op="a",le="+Inf"} 2',
+        'test_seconds_sum{op="a"} 3.5',
+        'test_seconds_count{op="a"} 2',
+    ]
+
+
+def test_metrics_endpoint(client, user):
+    client.get('/')
+    client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        'http_request_duration_seconds_count'
+        '{method="GET",route="/",status="200"}'
+    ) in response.text
+    assert (
+        'password_hash_duration_seconds_count{operation="verify_password"}'
+    ) in response.text
+    assert 'db_queries_per_request_count{route="/auth/token"}' in response.text
@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from fastzero.querylog import (
+    QueryBudgetExceeded,
+    instrument_query_log,
+    query_budget,
+)
+
+
+async def _execute(engine, *statements):
+    async with engine.connect() as conn:
+        for statement in statements:
+            await conn.execute(text(statement))
+
+
+@pytest.mark.asyncio
+async def test_slow_query_is_logged(engine, caplog):
+    # Engine próprio para não deixar listeners no engine dos testes
+    slow_engine = create_async_engine(engine.url)
+    instrument_query_log(slow_engine, slow_query_ms=0.0001, budget=0)
+
+    with caplog.at_level(logging.WARNING, logger='fastzero.sql'):
+        await _execute(slow_engine, 'SELECT 1')
+
+    await slow_engine.dispose()
+
+    assert 'Slow query' in caplog.text
+    assert 'SELECT 1' in caplog.text
+    assert 'outside request' in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_query_budget_exceeded(engine):
+    with (
+        pytest.raises(QueryBudgetExceeded, match='2 queries executed'),
+        query_budget(engine, 1),
+    ):
+        await _execute(engine, 'SELECT 1', 'SELECT 2')
+
+
+@pytest.mark.asyncio
+async def test_query_budget_within_limit(engine):
+    with query_budget(engine, 1) as statements:
+        await _execute(engine, 'SELECT 1')
+
+    assert statements == ['SELECT 1']
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from freezegun import freeze_time
+
+from fastzero.ratelimit import (
+    DatabaseBackend,
+    MemoryBackend,
+    Rate,
+    parse_rate,
+    rate_limiter,
+)
+
+
+@pytest.fixture
+def rate_limit(monkeypatch):
+    def _rate_limit(rules):
+        monkeypatch.setattr(rate_limiter, 'backend', MemoryBackend())
+        monkeypatch.setattr(rate_limiter, 'rules', rules)
+
+    return _rate_limit
+
+
+def test_parse_rate():
+    assert parse_rate('5/minute') == Rate(5, 60)
+
+
+@pytest.mark.parametrize('value', ['5', '5/week', 'x/second', '0/second'])
+def test_parse_rate_invalid(value):
+    with pytest.raises(ValueError, match='Invalid rate limit'):
+        parse_rate(value)
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_burst_and_refill():
+    backend = MemoryBackend()
+    rate = Rate(2, 60)
+
+    with freeze_time('2025-01-01 12:00:00') as frozen:
+        assert await backend.hit('a', rate) == 0
+        assert await backend.hit('a', rate) == 0
+        assert await backend.hit('a', rate) == 30  # noqa: PLR2004
+        # Outras chaves têm o seu próprio balde
+        assert await backend.hit('b', rate) == 0
+
+        frozen.tick(timedelta(seconds=30))
+        assert await backend.hit('a', rate) == 0
+        assert await backend.hit('a', rate) > 0
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_prunes_full_buckets():
+    backend = MemoryBackend(shards=1, max_keys=2)
+    rate = Rate(1, 1)
+
+    with freeze_time('2025-01-01 12:00:00') as frozen:
+        await backend.hit('a', rate)
+        await backend.hit('b', rate)
+        frozen.tick(timedelta(seconds=2))
+        await backend.hit('c', rate)
+
+    buckets, _ = backend._shards[0]
+    assert list(buckets) == ['c']
+
+
+@pytest.mark.asyncio
+async def test_database_backend(session, engine):
+    backend = DatabaseBackend(engine)
+    rate = Rate(2, 60)
+
+    assert await backend.hit('a', rate) == 0
+    assert await backend.hit('a', rate) == 0
+    assert await backend.hit('a', rate) > 0
+    assert await backend.hit('b', rate) == 0
+
+
+def test_login_rate_limited_by_ip(client, user, rate_limit):
+    rate_limit({'POST /auth/token': Rate(1, 60)})
+    data = {'username': user.email, 'password': 'wrong'}
+
+    response = client.post('/auth/token', data=data)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    response = client.post('/auth/token', data=data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json() == {'detail': 'Too many requests'}
+    assert response.headers['Retry-After'] == '60'
+
+
+def test_rate_limit_per_user(client, user, user2, rate_limit):
+    tokens = [
+        client.post(
+            '/auth/token',
+            data={'username': u.email, 'password': u.clean_password},
+        ).json()['access_token']
+        for u in (user, user2)
+    ]
+    rate_limit({'GET /tasks/': Rate(1, 60)})
+
+    for token in tokens:
+        response = client.get(
+            '/tasks/', headers={'Authorization': f'Bearer {token}'}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    response = client.get(
+        '/tasks/', headers={'Authorization': f'Bearer {tokens[0]}'}
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_routes_without_rule_are_not_limited(client, rate_limit):
+    rate_limit({'POST /auth/token': Rate(1, 60)})
+
+    for _ in range(3):
+        assert client.get('/').status_code == HTTPStatus.OK
@@ -1,11 +1,19 @@
 from http import HTTPStatus
 
+import pytest
+from fastapi import HTTPException
+from freezegun import freeze_time
 from jwt import decode
 
-from fastzero.security import create_access_token
-from fastzero.settings import Settings
+from fastzero import security
+from fastzero.security import (
+    create_access_token,
+    decode_access_token,
+    token_cache,
+)
+from fastzero.settings import get_settings
 
-settings = Settings()
+settings = get_settings()
 
 
 def test_jwt():
@@ -30,3 +38,37 @@ def test_jwt_invalid_token(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Not authenticated'}
+
+
+def test_decode_access_token_is_cached(monkeypatch):
+    token = create_access_token({'sub': 'test@test.com'})
+    payload = decode_access_token(token)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('token should come from the cache')
+
+    monkeypatch.setattr(security, 'decode', fail)
+
+    assert decode_access_token(token) is payload
+
+
+def test_decode_access_token_cache_respects_exp(monkeypatch):
+    monkeypatch.setattr(token_cache, 'ttl', 3600)
+
+    with freeze_time('2025-01-01 12:00:00'):
+        token = create_access_token({'sub': 'test@test.com'})
+        decode_access_token(token)
+
+    # Ainda no cache, mas depois do `exp`
+    with (
+        freeze_time('2025-01-01 12:31:00'),
+        pytest.raises(HTTPException),
+    ):
+        decode_access_token(token)
+
+
+def test_decode_access_token_invalid_is_not_cached():
+    with pytest.raises(HTTPException):
+        decode_access_token('invalid-token')
+
+    assert len(token_cache) == 0
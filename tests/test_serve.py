@@ -0,0 +1,46 @@
+from fastzero import serve
+from fastzero.settings import Settings
+
+
+def test_uvicorn_options_uses_configured_workers():
+    expected_workers = 3
+    settings = Settings(SERVER_WORKERS=expected_workers)
+
+    options = serve.uvicorn_options(settings)
+
+    assert options['workers'] == expected_workers
+    assert options['port'] == settings.SERVER_PORT
+
+
+def test_uvicorn_options_defaults_to_one_worker_per_cpu(monkeypatch):
+    expected_workers = 8
+    monkeypatch.setattr(serve, 'available_cpus', lambda: expected_workers)
+
+    options = serve.uvicorn_options(Settings(SERVER_WORKERS=0))
+
+    assert options['workers'] == expected_workers
+
+
+def test_uvicorn_options_trusts_configured_proxies():
+    settings = Settings(SERVER_FORWARDED_ALLOW_IPS='10.0.0.0/8')
+
+    options = serve.uvicorn_options(settings)
+
+    assert options['proxy_headers'] is True
+    assert options['forwarded_allow_ips'] == '10.0.0.0/8'
+
+
+def test_main_migrate(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        serve.command,
+        'upgrade',
+        lambda config, revision: calls.append((
+            config.get_main_option('script_location'),
+            revision,
+        )),
+    )
+
+    serve.main(['migrate'])
+
+    assert calls == [(str(serve.BASE_DIR / 'migrations'), 'head')]
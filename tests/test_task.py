@@ -1,6 +1,14 @@
+import csv
+import json
+from datetime import datetime
 from http import HTTPStatus
+from io import StringIO
 
+import pytest
+
+from fastzero.etags import resource_etag
 from fastzero.models import Task, TaskState
+from fastzero.security import create_access_token, settings
 from tests.conftest import TaskFactory
 
 
@@ -28,10 +36,11 @@ def test_create_task(client, token, mock_db_time):
     }
 
 
-def test_get_tasks_should_return_5_tasks(session, client, user, token):
+@pytest.mark.asyncio
+async def test_get_tasks_should_return_5_tasks(session, client, user, token):
     expected_tasks = 5
-    session.bulk_save_objects(TaskFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TaskFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         '/tasks/',
@@ -41,12 +50,68 @@ def test_get_tasks_should_return_5_tasks(session, client, user, token):
     assert len(response.json()['tasks']) == expected_tasks
 
 
-def test_get_tasks_pagination_should_return_2_tasks(
+@pytest.mark.asyncio
+async def test_list_tasks_payload(session, client, user, token, mock_db_time):
+    with mock_db_time(model=Task) as time:
+        task = TaskFactory(user_id=user.id, state=TaskState.TODO)
+        session.add(task)
+        await session.commit()
+
+    response = client.get(
+        '/tasks/',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == {
+        'tasks': [
+            {
+                'title': task.title,
+                'description': task.description,
+                'state': 'todo',
+                'id': task.id,
+                'user_id': user.id,
+                'created_at': time.isoformat(),
+                'updated_at': time.isoformat(),
+            }
+        ],
+        'next_cursor': None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_sparse_fields(session, client, user, token):
+    task = TaskFactory(user_id=user.id, state=TaskState.DONE)
+    session.add(task)
+    await session.commit()
+
+    response = client.get(
+        '/tasks/?fields=title,state',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.json()['tasks'] == [
+        {'id': task.id, 'title': task.title, 'state': 'done'}
+    ]
+
+
+def test_list_tasks_unknown_field(client, token):
+    response = client.get(
+        '/tasks/?fields=title,password',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Unknown fields: password'}
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_pagination_should_return_2_tasks(
     session, client, user, token
 ):
     expected_tasks = 2
-    session.bulk_save_objects(TaskFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TaskFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         '/tasks/?offset=1&limit=2',
@@ -56,14 +121,171 @@ def test_get_tasks_pagination_should_return_2_tasks(
     assert len(response.json()['tasks']) == expected_tasks
 
 
-def test_list_tasks_filter_title_should_return_5_tasks(
+@pytest.mark.asyncio
+async def test_list_tasks_cursor_pagination(session, client, user, token):
+    session.add_all(TaskFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    ids = []
+    cursor = ''
+    while True:
+        response = client.get(
+            f'/tasks/?limit=2&cursor={cursor}', headers=headers
+        )
+        data = response.json()
+        ids.extend(task['id'] for task in data['tasks'])
+
+        if not data['next_cursor']:
+            break
+        cursor = data['next_cursor']
+
+    assert ids == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_include_total(session, client, user, user2, token):
+    session.add_all(
+        TaskFactory.create_batch(3, user_id=user.id, state=TaskState.TODO)
+    )
+    session.add_all(
+        TaskFactory.create_batch(2, user_id=user.id, state=TaskState.DONE)
+    )
+    session.add_all(TaskFactory.create_batch(4, user_id=user2.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get(
+        '/tasks/?limit=2&include_total=true', headers=headers
+    )
+    data = response.json()
+    assert len(data['tasks']) == 2  # noqa: PLR2004
+    assert data['total'] == 5  # noqa: PLR2004
+    assert data['total_is_estimate'] is False
+
+    response = client.get(
+        '/tasks/?state=done&include_total=true', headers=headers
+    )
+    assert response.json()['total'] == 2  # noqa: PLR2004
+
+
+def test_list_tasks_total_cache_invalidated_on_write(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    assert (
+        client.get('/tasks/?include_total=true', headers=headers).json()[
+            'total'
+        ]
+        == 0
+    )
+
+    task = client.post(
+        '/tasks/',
+        headers=headers,
+        json={'title': 'Test', 'description': 'Test', 'state': 'todo'},
+    ).json()
+    response = client.get('/tasks/?include_total=true', headers=headers)
+    assert response.json()['total'] == 1
+
+    client.delete(f'/tasks/{task["id"]}', headers=headers)
+    response = client.get('/tasks/?include_total=true', headers=headers)
+    assert response.json()['total'] == 0
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_total_with_text_filter(session, client, user, token):
+    session.add_all(
+        TaskFactory.create_batch(3, user_id=user.id, title='Relatório mensal')
+    )
+    session.add_all(TaskFactory.create_batch(2, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Última página: o total exato sai da própria página
+    response = client.get(
+        '/tasks/?title=Relatório&include_total=true', headers=headers
+    )
+    data = response.json()
+    assert len(data['tasks']) == 3  # noqa: PLR2004
+    assert data['total'] == 3  # noqa: PLR2004
+    assert data['total_is_estimate'] is False
+
+    response = client.get(
+        '/tasks/?title=zzz&include_total=true', headers=headers
+    )
+    data = response.json()
+    assert data['tasks'] == []
+    assert data['total'] == 0
+    assert data['total_is_estimate'] is False
+
+    # Página intermediária: estimativa do planner do Postgres, nunca menor
+    # que as linhas já vistas
+    response = client.get(
+        '/tasks/?title=Relatório&offset=1&limit=1&include_total=true',
+        headers=headers,
+    )
+    data = response.json()
+    assert len(data['tasks']) == 1
+    assert data['total_is_estimate'] is True
+    assert data['total'] >= 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'text_filter', ['title=Relatório', 'search=relatório']
+)
+async def test_list_tasks_total_with_text_filter_and_state(
+    session, client, user, token, text_filter
+):
+    session.add_all(
+        TaskFactory.create_batch(
+            2, user_id=user.id, title='Relatório', state=TaskState.DONE
+        )
+    )
+    session.add_all(
+        TaskFactory.create_batch(
+            2, user_id=user.id, title='Relatório', state=TaskState.TODO
+        )
+    )
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get(
+        f'/tasks/?{text_filter}&state=done&include_total=true',
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert len(data['tasks']) == 2  # noqa: PLR2004
+    assert data['total'] == 2  # noqa: PLR2004
+    assert data['total_is_estimate'] is False
+
+    response = client.get(
+        f'/tasks/?{text_filter}&state=done&limit=1&include_total=true',
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert data['total_is_estimate'] is True
+    assert data['total'] >= 1
+
+
+def test_list_tasks_without_total(client, token):
+    response = client.get(
+        '/tasks/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert 'total' not in response.json()
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_filter_title_should_return_5_tasks(
     session, client, user, token
 ):
     expected_tasks = 5
-    session.bulk_save_objects(
+    session.add_all(
         TaskFactory.create_batch(5, user_id=user.id, title='Test Task 1')
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         '/tasks/?title=Test Task 1',
@@ -73,16 +295,17 @@ def test_list_tasks_filter_title_should_return_5_tasks(
     assert len(response.json()['tasks']) == expected_tasks
 
 
-def test_list_tasks_filter_description_should_return_5_tasks(
+@pytest.mark.asyncio
+async def test_list_tasks_filter_description_should_return_5_tasks(
     session, client, user, token
 ):
     expected_tasks = 5
-    session.bulk_save_objects(
+    session.add_all(
         TaskFactory.create_batch(
             5, user_id=user.id, description='Test Description'
         )
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         '/tasks/?description=Test Description',
@@ -92,14 +315,15 @@ def test_list_tasks_filter_description_should_return_5_tasks(
     assert len(response.json()['tasks']) == expected_tasks
 
 
-def test_list_tasks_filter_state_should_return_5_tasks(
+@pytest.mark.asyncio
+async def test_list_tasks_filter_state_should_return_5_tasks(
     session, client, user, token
 ):
     expected_tasks = 5
-    session.bulk_save_objects(
+    session.add_all(
         TaskFactory.create_batch(5, user_id=user.id, state=TaskState.DOING)
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         '/tasks/?state=doing',
@@ -109,11 +333,45 @@ def test_list_tasks_filter_state_should_return_5_tasks(
     assert len(response.json()['tasks']) == expected_tasks
 
 
-def test_get_tasks_filter_combined_should_return_5_tasks(
+@pytest.mark.asyncio
+async def test_list_tasks_search_should_return_matching_tasks(
+    session, client, user, token
+):
+    expected_tasks = 2
+    session.add_all([
+        TaskFactory(user_id=user.id, title='Comprar leite', description=''),
+        TaskFactory(user_id=user.id, title='Leite', description='comprar'),
+        TaskFactory(user_id=user.id, title='Comprar pão', description=''),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/tasks/?search=comprar leite',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert len(response.json()['tasks']) == expected_tasks
+    assert response.json()['next_cursor'] is None
+
+
+def test_list_tasks_search_with_cursor(client, token):
+    response = client.get(
+        '/tasks/?search=leite&cursor=MQ==',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {
+        'detail': 'Cursor pagination is not supported with search'
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_filter_combined_should_return_5_tasks(
     session, user, client, token
 ):
     expected_tasks = 5
-    session.bulk_save_objects(
+    session.add_all(
         TaskFactory.create_batch(
             5,
             user_id=user.id,
@@ -123,7 +381,7 @@ def test_get_tasks_filter_combined_should_return_5_tasks(
         )
     )
 
-    session.bulk_save_objects(
+    session.add_all(
         TaskFactory.create_batch(
             3,
             user_id=user.id,
@@ -132,7 +390,7 @@ def test_get_tasks_filter_combined_should_return_5_tasks(
             state=TaskState.TODO,
         )
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         '/tasks/?title=Test task combined&description=combined&state=done',
@@ -142,10 +400,11 @@ def test_get_tasks_filter_combined_should_return_5_tasks(
     assert len(response.json()['tasks']) == expected_tasks
 
 
-def test_delete_task(session, client, user, token):
+@pytest.mark.asyncio
+async def test_delete_task(session, client, user, token):
     task = TaskFactory(user_id=user.id)
     session.add(task)
-    session.commit()
+    await session.commit()
 
     response = client.delete(
         f'/tasks/{task.id}',
@@ -176,11 +435,12 @@ def test_patch_task_not_found(client, token):
     assert response.json() == {'detail': 'Task not found'}
 
 
-def test_patch_task_title(client, session, user, token):
+@pytest.mark.asyncio
+async def test_patch_task_title(client, session, user, token):
     task = TaskFactory(user_id=user.id)
     session.add(task)
-    session.commit()
-    session.refresh(task)
+    await session.commit()
+    await session.refresh(task)
 
     response = client.patch(
         f'/tasks/{task.id}',
@@ -192,3 +452,379 @@ def test_patch_task_title(client, session, user, token):
 
     assert response.status_code == HTTPStatus.OK
     assert response.json()['title'] == 'New title'
+
+
+def test_list_tasks_with_user_id_claim(client, monkeypatch):
+    monkeypatch.setattr(settings, 'TOKEN_USER_ID_CLAIM', True)
+    # O usuário não existe no banco: o id vem apenas do token
+    token = create_access_token({'sub': 'test@test.com', 'uid': 42})
+
+    response = client.get(
+        '/tasks/',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'tasks': [], 'next_cursor': None}
+
+
+def test_list_tasks_user_id_claim_disabled(client):
+    token = create_access_token({'sub': 'test@test.com', 'uid': 42})
+
+    response = client.get(
+        '/tasks/',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_create_tasks_bulk(client, token):
+    expected_tasks = 3
+    response = client.post(
+        '/tasks/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'tasks': [
+                {'title': f'task {i}', 'description': '', 'state': 'todo'}
+                for i in range(expected_tasks)
+            ]
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    tasks = response.json()['tasks']
+    assert [task['title'] for task in tasks] == ['task 0', 'task 1', 'task 2']
+    assert all(task['id'] and task['created_at'] for task in tasks)
+
+
+def test_create_tasks_bulk_empty(client, token):
+    response = client.post(
+        '/tasks/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'tasks': []},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_bulk(session, client, user, user2, token):
+    session.add_all(TaskFactory.create_batch(3, user_id=user.id))
+    other_task = TaskFactory(user_id=user2.id)
+    session.add(other_task)
+    await session.commit()
+
+    response = client.patch(
+        '/tasks/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ids': [1, 2, other_task.id], 'state': 'done'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    tasks = response.json()['tasks']
+    assert [task['id'] for task in tasks] == [1, 2]
+    assert {task['state'] for task in tasks} == {'done'}
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_bulk_without_values(session, client, user, token):
+    session.add_all(TaskFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+
+    response = client.patch(
+        '/tasks/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ids': [3, 1, 2]},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [task['id'] for task in response.json()['tasks']] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_delete_tasks_bulk(session, client, user, token):
+    session.add_all(TaskFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.request(
+        'DELETE', '/tasks/bulk', headers=headers, json={'ids': [1, 3]}
+    )
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = client.get('/tasks/', headers=headers)
+    assert [task['id'] for task in response.json()['tasks']] == [2]
+
+
+@pytest.mark.asyncio
+async def test_task_endpoints_query_budget(
+    session, client, user, token, max_queries
+):
+    session.add_all(TaskFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Usuário + versão do conjunto (ETag) + tarefas; depois o usuário vem
+    # do cache
+    with max_queries(3):
+        client.get('/tasks/', headers=headers)
+
+    with max_queries(1):
+        client.patch('/tasks/1', headers=headers, json={'title': 'New'})
+
+    with max_queries(1):
+        client.post(
+            '/tasks/',
+            headers=headers,
+            json={'title': 'title', 'description': '', 'state': 'todo'},
+        )
+
+    with max_queries(2):
+        client.delete('/tasks/1', headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_ndjson(session, client, user, user2, token):
+    expected_tasks = 3
+    session.add_all(TaskFactory.create_batch(3, user_id=user.id))
+    session.add(TaskFactory(user_id=user2.id))
+    await session.commit()
+
+    response = client.get(
+        '/tasks/export',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    tasks = [json.loads(line) for line in response.text.splitlines()]
+    assert len(tasks) == expected_tasks
+    assert {task['user_id'] for task in tasks} == {user.id}
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_csv(session, client, user, token):
+    task = TaskFactory(user_id=user.id, state=TaskState.DOING)
+    session.add(task)
+    await session.commit()
+
+    response = client.get(
+        '/tasks/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(StringIO(response.text)))
+    assert rows == [
+        {
+            'title': task.title,
+            'description': task.description,
+            'state': 'doing',
+            'id': str(task.id),
+            'user_id': str(user.id),
+            'created_at': task.created_at.isoformat(),
+            'updated_at': task.updated_at.isoformat(),
+        }
+    ]
+
+
+def test_import_tasks_ndjson(client, token):
+    content = (
+        '{"title": "a", "description": "", "state": "todo"}\n'
+        '\n'
+        '{"title": "b", "description": "", "state": "invalid"}\n'
+        'not json\n'
+        '{"title": "c", "description": "", "state": "done"}\n'
+    )
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.post(
+        '/tasks/import',
+        headers=headers,
+        files={'file': ('tasks.ndjson', content, 'application/x-ndjson')},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    report = response.json()
+    assert report['imported'] == 2  # noqa: PLR2004
+    assert report['failed'] == 2  # noqa: PLR2004
+    assert [error['row'] for error in report['errors']] == [3, 4]
+    assert report['errors'][0]['detail'].startswith('state: ')
+    assert report['errors'][1]['detail'] == 'Invalid JSON'
+
+    response = client.get('/tasks/', headers=headers)
+    assert [t['title'] for t in response.json()['tasks']] == ['a', 'c']
+
+
+def test_import_tasks_csv(client, token):
+    content = (
+        'title,description,state\n'
+        'a,"multi\nline",doing\n'
+        'b,,draft\n'
+        ',missing state,\n'
+    )
+
+    response = client.post(
+        '/tasks/import?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+        files={'file': ('tasks.csv', content, 'text/csv')},
+    )
+
+    report = response.json()
+    assert report['imported'] == 2  # noqa: PLR2004
+    assert report['failed'] == 1
+    assert report['errors'][0]['row'] == 4  # noqa: PLR2004
+
+
+def test_import_tasks_rejected_by_database(client, token):
+    # O Postgres não aceita NUL em colunas de texto
+    content = (
+        '{"title": "a", "description": "", "state": "todo"}\n'
+        '{"title": "b\\u0000", "description": "", "state": "todo"}\n'
+        '{"title": "c", "description": "", "state": "invalid"}\n'
+        '{"title": "d", "description": "", "state": "done"}\n'
+    )
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.post(
+        '/tasks/import',
+        headers=headers,
+        files={'file': ('tasks.ndjson', content, 'application/x-ndjson')},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    report = response.json()
+    assert report['imported'] == 2  # noqa: PLR2004
+    assert report['failed'] == 2  # noqa: PLR2004
+    assert report['errors'][0] == {
+        'row': 2,
+        'detail': 'Rejected by the database',
+    }
+    assert report['errors'][1]['row'] == 3  # noqa: PLR2004
+
+    response = client.get('/tasks/', headers=headers)
+    assert [t['title'] for t in response.json()['tasks']] == ['a', 'd']
+
+
+def test_import_tasks_invalid_encoding(client, token):
+    response = client.post(
+        '/tasks/import',
+        headers={'Authorization': f'Bearer {token}'},
+        files={'file': ('tasks.ndjson', b'\xff\xfe', 'text/plain')},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'File must be UTF-8 encoded'}
+
+
+@pytest.mark.asyncio
+async def test_task_stats(session, client, user, user2, token, mock_db_time):
+    with mock_db_time(model=Task, time=datetime(2024, 1, 1, 10)):
+        session.add_all(
+            TaskFactory.create_batch(2, user_id=user.id, state=TaskState.TODO)
+        )
+        await session.commit()
+    with mock_db_time(model=Task, time=datetime(2024, 1, 2, 10)):
+        session.add(TaskFactory(user_id=user.id, state=TaskState.DONE))
+        session.add(TaskFactory(user_id=user2.id, state=TaskState.DONE))
+        await session.commit()
+
+    response = client.get(
+        '/tasks/stats?by_day=true',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'total': 3,
+        'by_state': {
+            'todo': 2,
+            'doing': 0,
+            'done': 1,
+            'draft': 0,
+            'trash': 0,
+        },
+        'by_day': [
+            {'day': '2024-01-01', 'count': 2},
+            {'day': '2024-01-02', 'count': 1},
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_etag_not_modified(session, client, user, token):
+    session.add_all(TaskFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get('/tasks/?limit=2', headers=headers)
+    etag = response.headers['ETag']
+
+    response = client.get(
+        '/tasks/?limit=2', headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+    # Outros parâmetros são outra representação
+    response = client.get(
+        '/tasks/?limit=3', headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_etag_changes_after_delete(
+    session, client, user, token
+):
+    session.add_all(TaskFactory.create_batch(2, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/tasks/', headers=headers).headers['ETag']
+
+    client.delete('/tasks/1', headers=headers)
+
+    response = client.get(
+        '/tasks/', headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+
+
+@pytest.mark.asyncio
+async def test_patch_task_if_match(session, client, user, token, mock_db_time):
+    with mock_db_time(model=Task):
+        session.add(TaskFactory(user_id=user.id))
+        await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.patch(
+        '/tasks/1',
+        headers={**headers, 'If-Match': '"1"'},
+        json={'title': 'Stale'},
+    )
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert response.json() == {'detail': 'Resource has been modified'}
+
+    response = client.patch(
+        '/tasks/1',
+        headers={**headers, 'If-Match': resource_etag(datetime(2024, 1, 1))},
+        json={'title': 'Fresh'},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['title'] == 'Fresh'
+    assert 'ETag' in response.headers
+
+
+def test_patch_task_if_match_not_found(client, token):
+    response = client.patch(
+        '/tasks/10',
+        headers={'Authorization': f'Bearer {token}', 'If-Match': '"1"'},
+        json={'title': 'Test'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import text
+
+from fastzero.models import TaskState
+from fastzero.routers.tasks import list_tasks_query, task_by_id_query
+
+
+async def _explain(session, query):
+    dialect = session.bind.dialect
+    sql = str(
+        query.compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+    )
+
+    if dialect.name == 'postgresql':
+        # Com a tabela vazia o Postgres sempre prefere o seq scan, então
+        # desligamos para verificar se algum índice atende a consulta
+        await session.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = await session.execute(text(f'EXPLAIN {sql}'))
+    else:
+        plan = await session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))
+
+    return '\n'.join(str(row[-1]) for row in plan)
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_uses_user_index(session):
+    query = list_tasks_query(1, session.bind.dialect.name, limit=10)
+
+    plan = await _explain(session, query)
+
+    assert 'ix_tasks_user_id' in plan
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_cursor_uses_user_index(session):
+    query = list_tasks_query(
+        1, session.bind.dialect.name, limit=10, cursor='MTA='
+    )
+
+    plan = await _explain(session, query)
+
+    assert 'ix_tasks_user_id' in plan
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_by_state_uses_user_index(session):
+    query = list_tasks_query(
+        1, session.bind.dialect.name, state=TaskState.DOING, limit=10
+    )
+
+    plan = await _explain(session, query)
+
+    assert 'ix_tasks_user_id' in plan
+
+
+@pytest.mark.asyncio
+async def test_task_by_id_does_not_scan_table(session):
+    plan = await _explain(session, task_by_id_query(1, 1))
+
+    assert 'Seq Scan' not in plan
+    assert 'SCAN tasks' not in plan
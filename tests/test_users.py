@@ -1,7 +1,12 @@
 from http import HTTPStatus
 
+import pytest
+
+from fastzero.etags import resource_etag
 from fastzero.models import User
 from fastzero.schemas import UserPublic
+from fastzero.security import create_access_token
+from tests.conftest import UserFactory
 
 
 def test_create_user(client, mock_db_time):
@@ -61,7 +66,7 @@ def test_get_users(client):
     response = client.get('/users/')  # Act
 
     assert response.status_code == HTTPStatus.OK  # Assert
-    assert response.json() == {'users': []}  # Assert
+    assert response.json() == {'users': [], 'next_cursor': None}  # Assert
 
 
 def test_get_users_with_users_registered(client, user):
@@ -72,7 +77,10 @@ def test_get_users_with_users_registered(client, user):
     user_schema['updated_at'] = user.updated_at.isoformat()
 
     assert response.status_code == HTTPStatus.OK  # Assert
-    assert response.json() == {'users': [user_schema]}  # Assert
+    assert response.json() == {
+        'users': [user_schema],
+        'next_cursor': None,
+    }  # Assert
 
 
 def test_update_user(client, user, token):
@@ -148,3 +156,125 @@ def test_delete_wrong_user(client, user2, token):
 
     assert response.status_code == HTTPStatus.FORBIDDEN
     assert response.json() == {'detail': 'Not enough permissions'}
+
+
+def test_deleted_user_token_is_not_served_from_cache(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Primeira chamada popula o cache do usuário
+    response = client.get('/tasks/', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.delete(f'/users/{user.id}', headers=headers)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = client.get('/tasks/', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_old_token_after_email_change_is_not_served_from_cache(
+    client, user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Primeira chamada popula o cache com o email antigo
+    response = client.get('/tasks/', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': user.username,
+            'email': 'novo@test.com',
+            'password': user.clean_password,
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get('/tasks/', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_get_users_cursor_pagination(client, user, user2):
+    response = client.get('/users/?limit=1')
+    data = response.json()
+
+    assert [u['id'] for u in data['users']] == [user.id]
+    assert data['next_cursor']
+
+    response = client.get(f'/users/?limit=1&cursor={data["next_cursor"]}')
+    data = response.json()
+
+    assert [u['id'] for u in data['users']] == [user2.id]
+
+    response = client.get(f'/users/?limit=1&cursor={data["next_cursor"]}')
+
+    assert response.json() == {'users': [], 'next_cursor': None}
+
+
+def test_get_users_invalid_cursor(client):
+    response = client.get('/users/?cursor=invalid')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_get_user_by_id_etag(client, user):
+    response = client.get(f'/users/{user.id}')
+    etag = response.headers['ETag']
+    assert etag == resource_etag(user.updated_at)
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+
+
+def test_get_users_etag(client, user):
+    etag = client.get('/users/').headers['ETag']
+
+    response = client.get('/users/', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    client.post(
+        '/users/',
+        json={
+            'username': 'alice',
+            'email': 'alice@example.com',
+            'password': 'secret',
+        },
+    )
+    response = client.get('/users/', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_update_user_if_match(session, client, mock_db_time):
+    with mock_db_time(model=User) as time:
+        user = UserFactory()
+        session.add(user)
+        await session.commit()
+    payload = {
+        'username': 'TESTE UPDATE',
+        'email': 'teste@email.com',
+        'password': '12345',
+    }
+    headers = {
+        'Authorization': f'Bearer {create_access_token({"sub": user.email})}'
+    }
+
+    response = client.put(
+        f'/users/{user.id}',
+        headers={**headers, 'If-Match': '"1"'},
+        json=payload,
+    )
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+
+    response = client.put(
+        f'/users/{user.id}',
+        headers={**headers, 'If-Match': resource_etag(time)},
+        json=payload,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'TESTE UPDATE'
+    assert 'ETag' in response.headers